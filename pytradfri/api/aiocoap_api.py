@@ -4,9 +4,13 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import Callable
+from concurrent.futures import Executor
+from contextlib import suppress
 from enum import Enum
 import json
 import logging
+import random
+from time import monotonic
 from typing import Any, Protocol, cast, overload
 
 from aiocoap import Context, Message
@@ -18,14 +22,25 @@ from aiocoap.error import (
     TimeoutError as COAPTimeoutError,
 )
 from aiocoap.numbers.codes import Code
-from aiocoap.protocol import BlockwiseRequest
+from aiocoap.protocol import BlockwiseRequest, ClientObservation
 
-from ..command import Command, T
-from ..error import ClientError, RequestTimeout, ServerError
+from ..command import Command, T, merge_payloads
+from ..error import ClientError, RequestError, RequestTimeout, ServerError
 from ..gateway import Gateway
+from .recovery import RecoveryPolicy
+from .scheduler import AdaptiveWindow, BatchStats, RequestScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
+_METHOD_CODES = {
+    "get": Code.GET,
+    "put": Code.PUT,
+    "post": Code.POST,
+    "delete": Code.DELETE,
+    "fetch": Code.FETCH,
+    "patch": Code.PATCH,
+}
+
 
 class UndefinedType(Enum):
     """Singleton type for use with not set sentinel values."""
@@ -58,12 +73,22 @@ class APIRequestProtocol(Protocol):
 class APIFactory:
     """ApiFactory."""
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         host: str,
         psk_id: str = "pytradfri",
         psk: str | None = None,
         internal_create: UndefinedType | None = None,
+        *,
+        max_in_flight: int | None = None,
+        adaptive_window: bool = False,
+        coalesce_gets: bool = False,
+        coalesce_writes: bool = False,
+        recovery_policy: RecoveryPolicy | None = None,
+        reobserve_parallelism: int = 4,
+        reobserve_jitter: float = 1.0,
+        renew_observations: bool = False,
+        decode_executor: Executor | None = None,
     ) -> None:
         """Create object of class."""
         if internal_create is not _SENTINEL:
@@ -76,13 +101,99 @@ class APIFactory:
         self._protocol: asyncio.Task[Context] | None = None
         self._reset_lock = asyncio.Lock()
         self._shutdown = False
+        self._scheduler = RequestScheduler(max_in_flight)
+        self._adaptive_window: AdaptiveWindow | None = None
+        if adaptive_window:
+            maximum = max_in_flight or 32
+            self._adaptive_window = AdaptiveWindow(
+                self._scheduler, initial=min(4, maximum), maximum=maximum
+            )
+        self._last_batch_stats: BatchStats | None = None
+        self._recovery_policy = recovery_policy or RecoveryPolicy()
+        self._coalesce_gets = coalesce_gets
+        self._pending_gets: dict[
+            tuple[str, bool], asyncio.Future[list[Any] | dict[Any, Any] | str | None]
+        ] = {}
+        self._coalesce_writes = coalesce_writes
+        self._writes_in_flight: dict[str, asyncio.Future[Any]] = {}
+        self._queued_writes: dict[str, _QueuedWrite] = {}
+        self._protocol_generation = 0
+        self._observations: dict[str, _Observation] = {}
+        self._reobserve_parallelism = reobserve_parallelism
+        self._reobserve_jitter = reobserve_jitter
+        self._reobserve_task: asyncio.Task[None] | None = None
+        self._renew_observations = renew_observations
+        self._renew_tasks: set[asyncio.Task[None]] = set()
+        self._decode_executor = decode_executor
+        self._notification_stats = NotificationStats()
 
     @classmethod
-    async def init(
-        cls, host: str, psk_id: str = "pytradfri", psk: str | None = None
+    async def init(  # pylint: disable=too-many-arguments
+        cls,
+        host: str,
+        psk_id: str = "pytradfri",
+        psk: str | None = None,
+        *,
+        max_in_flight: int | None = None,
+        adaptive_window: bool = False,
+        coalesce_gets: bool = False,
+        coalesce_writes: bool = False,
+        recovery_policy: RecoveryPolicy | None = None,
+        reobserve_parallelism: int = 4,
+        reobserve_jitter: float = 1.0,
+        renew_observations: bool = False,
+        decode_executor: Executor | None = None,
     ) -> APIFactory:
-        """Initialize an APIFactory."""
-        instance = cls(host, psk_id=psk_id, psk=psk, internal_create=_SENTINEL)
+        """Initialize an APIFactory.
+
+        max_in_flight limits the number of requests sent to the gateway
+        at the same time. Requests exceeding the limit are queued and sent
+        in the order they were made. None means no limit.
+
+        adaptive_window tunes the limit from the observed round trip times,
+        using max_in_flight as the upper bound (32 if not set).
+
+        coalesce_gets lets GET commands for the same path share a single
+        request to the gateway while one is in flight. A GET joining a
+        request may get a state older than a write that completed after
+        the shared request was sent.
+
+        coalesce_writes merges PUT commands for a path while a PUT to the
+        same path is in flight. Only the merged payload is sent once the
+        previous request is done, the last value of each attribute wins.
+
+        recovery_policy decides when timeouts reset the protocol and how
+        often a timed out request is retried.
+
+        Observations are started again after the protocol is reset because
+        of an error. At most reobserve_parallelism observations are started
+        at the same time, each after a random delay of up to
+        reobserve_jitter seconds.
+
+        renew_observations renews each observation before its observe
+        duration runs out. Renewals are spread between 70% and 90% of the
+        duration so observations started together don't expire together.
+
+        decode_executor, like a ThreadPoolExecutor, is used to parse and
+        decode notifications of observations outside of the event loop.
+        The results are passed to the subscribers on the event loop, in
+        the order the notifications of a path were received.
+        """
+        instance = cls(
+            host,
+            psk_id=psk_id,
+            psk=psk,
+            internal_create=_SENTINEL,
+            max_in_flight=max_in_flight,
+            adaptive_window=adaptive_window,
+            coalesce_gets=coalesce_gets,
+            coalesce_writes=coalesce_writes,
+            recovery_policy=recovery_policy,
+            reobserve_parallelism=reobserve_parallelism,
+            reobserve_jitter=reobserve_jitter,
+            renew_observations=renew_observations,
+            decode_executor=decode_executor,
+        )
         if psk:
             await instance._update_credentials()
         return instance
@@ -97,6 +208,31 @@ class APIFactory:
         """Return psk."""
         return self._psk
 
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Return the scheduler limiting the requests in flight."""
+        return self._scheduler
+
+    @property
+    def adaptive_window(self) -> AdaptiveWindow | None:
+        """Return the controller of the adaptive in-flight window, if any."""
+        return self._adaptive_window
+
+    @property
+    def recovery_policy(self) -> RecoveryPolicy:
+        """Return the policy deciding when to reset the protocol."""
+        return self._recovery_policy
+
+    @property
+    def notification_stats(self) -> NotificationStats:
+        """Return the event loop time spent handling notifications."""
+        return self._notification_stats
+
+    @property
+    def last_batch_stats(self) -> BatchStats | None:
+        """Return the timing statistics of the last list request."""
+        return self._last_batch_stats
+
     async def _get_protocol(self, check_reset_lock: bool = True) -> Context:
         """Get the protocol for the request."""
         if check_reset_lock and self._reset_lock.locked():
@@ -134,19 +270,107 @@ class APIFactory:
                 await protocol.shutdown()
             finally:
                 self._protocol = None
+                self._protocol_generation += 1
                 # The error callbacks are called when shutting down the protocol.
                 # Clear the saved callbacks
                 self._observations_err_callbacks.clear()
 
+    async def _recover(self, exc: BaseException) -> None:
+        """Reset the protocol and load the credentials again."""
+        self._recovery_policy.record_reset()
+        await self._reset_protocol(exc)
+        await self._update_credentials()
+
+        if self._observations and (
+            self._reobserve_task is None or self._reobserve_task.done()
+        ):
+            self._reobserve_task = asyncio.create_task(self._reobserve())
+
+    async def _reobserve(self) -> None:
+        """Start the observations lost by resetting the protocol again."""
+        semaphore = asyncio.Semaphore(self._reobserve_parallelism)
+
+        async def reobserve(observation: _Observation) -> None:
+            """Start a single observation again."""
+            # Spread the requests so the gateway isn't flooded after a reset.
+            await asyncio.sleep(random.uniform(0, self._reobserve_jitter))
+            async with semaphore:
+                if self._observations.get(observation.path) is not observation:
+                    # Every subscriber left in the meantime.
+                    return
+                try:
+                    await self._start_observation(observation)
+                except RequestError as exc:
+                    _LOGGER.debug(
+                        "Failed to observe %s again: %s", observation.path, exc
+                    )
+                    self._end_observation(observation, exc)
+
+        # Loop, since the protocol may be reset again while observing.
+        while stale := [
+            observation
+            for observation in self._observations.values()
+            if observation.generation != self._protocol_generation
+        ]:
+            _LOGGER.debug("Observing %s resources again", len(stale))
+            await asyncio.gather(*(reobserve(observation) for observation in stale))
+
     async def shutdown(self, exc: Exception | None = None) -> None:
         """Shutdown the API events.
 
         This should be called before closing the event loop.
         """
+        for observation in self._observations.values():
+            observation.cancel_renewal()
+        self._observations.clear()
+        for task in self._renew_tasks:
+            task.cancel()
+        if self._reobserve_task is not None:
+            self._reobserve_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._reobserve_task
         await self._reset_protocol(exc)
         self._shutdown = True
 
     async def _get_response(
+        self, msg: Message, timeout: float | None, stats: BatchStats | None = None
+    ) -> tuple[BlockwiseRequest, Message]:
+        """Wait for a free slot and perform the request."""
+        queued_at = monotonic()
+        async with self._scheduler.slot():
+            started_at = monotonic()
+            try:
+                return await self._send_with_retries(msg, timeout)
+            finally:
+                if stats is not None:
+                    stats.record(started_at - queued_at, monotonic() - started_at)
+
+    async def _send_with_retries(
+        self, msg: Message, timeout: float | None
+    ) -> tuple[BlockwiseRequest, Message]:
+        """Perform the request, retry it according to the recovery policy."""
+        attempt = 0
+        while True:
+            started_at = monotonic()
+            try:
+                # A message can only be sent once, send a copy when retrying.
+                result = await self._send_request(
+                    msg if attempt == 0 else msg.copy(), timeout
+                )
+            except RequestTimeout:
+                if self._adaptive_window is not None:
+                    self._adaptive_window.on_timeout(started_at)
+                if attempt >= self._recovery_policy.retries:
+                    raise
+                attempt += 1
+                self._recovery_policy.record_retry()
+                _LOGGER.debug("Retrying %s %s", self._host, msg)
+            else:
+                if self._adaptive_window is not None:
+                    self._adaptive_window.on_success(monotonic() - started_at)
+                return result
+
+    async def _send_request(
         self, msg: Message, timeout: float | None
     ) -> tuple[BlockwiseRequest, Message]:
         """Perform the request, get the response."""
@@ -154,36 +378,41 @@ class APIFactory:
             protocol = await self._get_protocol()
             pr_req: BlockwiseRequest = protocol.request(msg)
             pr_resp: Message = await asyncio.wait_for(pr_req.response, timeout)
+            self._recovery_policy.record_success()
             return pr_req, pr_resp
         except CredentialsMissingError as exc:
-            await self._reset_protocol(exc)
-            await self._update_credentials()
+            await self._recover(exc)
             raise ServerError("There was an error with the request.", exc) from exc
         except ConstructionRenderableError as exc:
             raise ClientError("There was an error with the request.", exc) from exc
-        except asyncio.TimeoutError as exc:
-            await self._reset_protocol(exc)
-            await self._update_credentials()
-            raise RequestTimeout("Request timed out.", exc) from exc
-        except COAPTimeoutError as exc:
-            await self._reset_protocol(exc)
-            await self._update_credentials()
+        except (asyncio.TimeoutError, COAPTimeoutError) as exc:
+            # A single slow resource should not tear down every request and
+            # observation, only reset when the session looks dead. Exhausted
+            # retransmissions mean the gateway itself didn't answer.
+            if self._recovery_policy.record_failure(
+                "/".join(msg.opt.uri_path),
+                unanswered=isinstance(exc, COAPTimeoutError),
+            ):
+                await self._recover(exc)
             raise RequestTimeout("Request timed out.", exc) from exc
         except LibraryShutdown as exc:
             raise ClientError("Protocol is shutdown.", exc) from exc
         except Error as exc:
-            await self._reset_protocol(exc)
-            await self._update_credentials()
+            await self._recover(exc)
             raise ServerError("There was an error with the request.", exc) from exc
         except asyncio.CancelledError as exc:
-            await self._reset_protocol(exc)
-            await self._update_credentials()
+            await self._recover(exc)
             raise exc
 
-    async def _execute(self, api_command: Command[T], timeout: float | None) -> T:
+    async def _execute(
+        self,
+        api_command: Command[T],
+        timeout: float | None,
+        stats: BatchStats | None = None,
+    ) -> T:
         """Execute the command."""
         if api_command.observe:
-            await self._observe(api_command, timeout)
+            await self._observe(api_command, timeout, stats)
             # The observe command result is set by the observe helper method above.
             return api_command.result
 
@@ -192,32 +421,133 @@ class APIFactory:
         parse_json = api_command.parse_json
         url = api_command.url(self._host)
 
-        kwargs = {}
+        api_method = _METHOD_CODES.get(method, Code.GET)
 
-        if data is not None:
-            kwargs["payload"] = json.dumps(data).encode("utf-8")
+        _LOGGER.debug("Executing %s %s", self._host, api_command)
 
-        api_method = Code.GET
-        if method == "put":
-            api_method = Code.PUT
-        elif method == "post":
-            api_method = Code.POST
-        elif method == "delete":
-            api_method = Code.DELETE
-        elif method == "fetch":
-            api_method = Code.FETCH
-        elif method == "patch":
-            api_method = Code.PATCH
+        if self._coalesce_writes and api_method == Code.PUT and isinstance(data, dict):
+            output = await self._coalesced_put(
+                api_command.path_str,
+                url,
+                data,
+                parse_json=parse_json,
+                timeout=timeout,
+                stats=stats,
+            )
+            api_command.process_result(output)
+            return api_command.result
 
-        msg = Message(code=api_method, uri=url, **kwargs)
+        msg = _build_message(api_method, url, api_command.payload_bytes)
 
-        _LOGGER.debug("Executing %s %s", self._host, api_command)
+        if self._coalesce_gets and api_method == Code.GET and data is None:
+            output = await self._coalesced_get(
+                (api_command.path_str, parse_json), msg, timeout, stats
+            )
+        else:
+            _, res = await self._get_response(msg, timeout, stats)
+            output = _process_output(res, parse_json)
 
-        _, res = await self._get_response(msg, timeout)
-        api_command.process_result(_process_output(res, parse_json))
+        api_command.process_result(output)
 
         return api_command.result
 
+    async def _coalesced_get(
+        self,
+        key: tuple[str, bool],
+        msg: Message,
+        timeout: float | None,
+        stats: BatchStats | None,
+    ) -> list[Any] | dict[Any, Any] | str | None:
+        """Share a single GET request between all callers of the same path."""
+        # A request in flight during a protocol reset is about to fail,
+        # so only join requests while the protocol is healthy.
+        while (
+            pending := self._pending_gets.get(key)
+        ) is not None and not self._reset_lock.locked():
+            _LOGGER.debug("Joining in-flight request %s %s", self._host, key[0])
+            try:
+                # Cancelling this caller must not cancel the shared request.
+                return await asyncio.wait_for(asyncio.shield(pending), timeout)
+            except asyncio.TimeoutError as exc:
+                raise RequestTimeout("Request timed out.", exc) from exc
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller performing the request was cancelled, take over.
+
+        future: asyncio.Future[list[Any] | dict[Any, Any] | str | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._pending_gets[key] = future
+        try:
+            _, res = await self._get_response(msg, timeout, stats)
+            output = _process_output(res, key[1])
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved in case nobody joined.
+            future.exception()
+            raise
+        finally:
+            if self._pending_gets.get(key) is future:
+                del self._pending_gets[key]
+
+        future.set_result(output)
+        return output
+
+    async def _coalesced_put(
+        self,
+        path: str,
+        url: str,
+        data: dict[str, Any],
+        *,
+        parse_json: bool,
+        timeout: float | None,
+        stats: BatchStats | None,
+    ) -> Any:
+        """Merge PUT requests to a path while a PUT to the path is in flight."""
+        while (queued := self._queued_writes.get(path)) is not None:
+            _LOGGER.debug("Merging write to %s %s", self._host, path)
+            queued.data = merge_payloads(queued.data, data)
+            try:
+                return await asyncio.shield(queued.future)
+            except asyncio.CancelledError:
+                if not queued.future.cancelled():
+                    raise
+                # The caller sending the merged write was cancelled, retry.
+
+        queued = _QueuedWrite(data)
+        try:
+            if (in_flight := self._writes_in_flight.get(path)) is not None:
+                # Wait for the previous write, other writes are merged meanwhile.
+                self._queued_writes[path] = queued
+                try:
+                    await asyncio.wait([in_flight])
+                finally:
+                    if self._queued_writes.get(path) is queued:
+                        del self._queued_writes[path]
+
+            self._writes_in_flight[path] = queued.future
+            msg = _build_message(Code.PUT, url, json.dumps(queued.data).encode("utf-8"))
+            _, res = await self._get_response(msg, timeout, stats)
+            output = _process_output(res, parse_json)
+        except asyncio.CancelledError:
+            queued.future.cancel()
+            raise
+        except Exception as exc:
+            queued.future.set_exception(exc)
+            # Mark the exception as retrieved in case nobody merged.
+            queued.future.exception()
+            raise
+        finally:
+            if self._writes_in_flight.get(path) is queued.future:
+                del self._writes_in_flight[path]
+
+        queued.future.set_result(output)
+        return output
+
     @overload
     async def request(
         self, api_commands: Command[T], timeout: float | None = None
@@ -240,43 +570,294 @@ class APIFactory:
             return result
 
         _LOGGER.debug("REQUEST call multiple: %s %s", self._host, api_commands)
-        commands = (self._execute(api_command, timeout) for api_command in api_commands)
+        stats = self._last_batch_stats = BatchStats()
+        commands = (
+            self._execute(api_command, timeout, stats) for api_command in api_commands
+        )
         command_results: list[T] = await asyncio.gather(*commands)
         _LOGGER.debug("REQUEST result multiple: %s", command_results)
+        _LOGGER.debug("REQUEST stats multiple: %s %s", self._host, stats)
 
         return command_results
 
-    async def _observe(self, api_command: Command[T], timeout: float | None) -> None:
-        """Observe an endpoint."""
-        duration = api_command.observe_duration
-        url = api_command.url(self._host)
-        err_callback = api_command.err_callback
+    async def _observe(
+        self,
+        api_command: Command[T],
+        timeout: float | None,
+        stats: BatchStats | None = None,
+    ) -> None:
+        """Observe an endpoint.
+
+        There is a single observation per path. Commands observing a path
+        that is already observed subscribe to the existing observation.
+        If it got no notification for longer than its duration, the
+        observation is registered again with the gateway, which may have
+        dropped it. The subscribers get the new result, or the error
+        callback if it fails.
+        """
+        path = api_command.path_str
 
-        msg = Message(code=Code.GET, uri=url, observe=duration)
+        while (observation := self._observations.get(path)) is not None:
+            _LOGGER.debug("Subscribing to observation %s %s", self._host, path)
+            observation.subscribers.append(api_command)
+            if observation.ready.done():
+                await self._join(observation, api_command)
+                return
+            # The result is passed to the subscribers once started.
+            try:
+                await asyncio.shield(observation.ready)
+                return
+            except asyncio.CancelledError:
+                observation.remove_subscriber(api_command)
+                if not observation.ready.cancelled():
+                    raise
+                # The command starting the observation was cancelled, take over.
+            except BaseException:
+                observation.remove_subscriber(api_command)
+                raise
+
+        observation = self._observations[path] = _Observation(
+            path,
+            api_command.url(self._host),
+            api_command.observe_duration,
+            timeout,
+        )
+        observation.subscribers.append(api_command)
+        try:
+            await self._start_observation(observation, stats)
+        except BaseException as exc:
+            if self._observations.get(path) is observation:
+                del self._observations[path]
+            if not observation.ready.done():
+                if isinstance(exc, asyncio.CancelledError):
+                    # Only this command was cancelled, a subscriber takes over.
+                    observation.ready.cancel()
+                else:
+                    observation.ready.set_exception(exc)
+                    # Mark the exception as retrieved in case nobody subscribed.
+                    observation.ready.exception()
+            raise
+
+    async def _start_observation(
+        self, observation: _Observation, stats: BatchStats | None = None
+    ) -> None:
+        """Start observing and pass the result to the subscribers."""
+        msg = Message(code=Code.GET, uri=observation.url, observe=observation.duration)
+        generation = self._protocol_generation
 
         # Note that this is necessary to start observing
-        pr_req, pr_rsp = await self._get_response(msg, timeout)
-
-        api_command.process_result(_process_output(pr_rsp))
+        pr_req, pr_rsp = await self._get_response(msg, observation.timeout, stats)
 
         def success_callback(res: Message) -> None:
-            api_command.process_result(_process_output(res))
+            if self._decode_executor is not None:
+                self._decode_in_executor(observation, res)
+                return
+
+            started_at = monotonic()
+            try:
+                output = _process_output(res)
+            except RequestError as exc:
+                _LOGGER.warning(
+                    "Invalid notification for %s: %s", observation.path, exc
+                )
+                return
+            _deliver_notification(
+                observation,
+                output,
+                _decode_notification(observation.subscribers, output),
+            )
+            self._notification_stats.record(monotonic() - started_at)
 
         def error_callback(exc: Exception) -> None:
             if isinstance(exc, LibraryShutdown):
                 _LOGGER.debug("Protocol is shutdown, stopping observation")
                 return
 
-            if err_callback:
-                err_callback(exc)
+            if observation.client_observation is pr_req.observation:
+                self._end_observation(observation, exc)
+
+        observation.output = _process_output(pr_rsp)
+        observation.last_notification = asyncio.get_running_loop().time()
+        for subscriber in list(observation.subscribers):
+            subscriber.process_result(observation.output)
+        if not observation.ready.done():
+            observation.ready.set_result(None)
 
-        observation = pr_req.observation
+        client_observation = pr_req.observation
         # The observation is set on the request
         # since we pass a Message with observe set above.
-        assert observation is not None
-        observation.register_callback(success_callback)
-        observation.register_errback(error_callback)
-        self._observations_err_callbacks.append(observation.error)
+        assert client_observation is not None
+        client_observation.register_callback(success_callback)
+        client_observation.register_errback(error_callback)
+        self._observations_err_callbacks.append(client_observation.error)
+        observation.client_observation = client_observation
+        observation.generation = generation
+        self._schedule_renewal(observation)
+
+    def _decode_in_executor(self, observation: _Observation, res: Message) -> None:
+        """Decode a notification in the executor and deliver it in order."""
+        assert self._decode_executor is not None
+        subscribers = list(observation.subscribers)
+
+        def decode() -> tuple[Any, list[tuple[Command[Any], Any]]]:
+            """Parse the payload and decode it for every subscriber."""
+            output = _process_output(res)
+            return output, _decode_notification(subscribers, output)
+
+        decoding = asyncio.get_running_loop().run_in_executor(
+            self._decode_executor, decode
+        )
+        previous = observation.delivery
+
+        async def deliver() -> None:
+            """Deliver the notification once the previous one is delivered."""
+            if previous is not None:
+                await previous
+            try:
+                output, decoded = await decoding
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning(
+                    "Invalid notification for %s: %s", observation.path, exc
+                )
+                return
+            started_at = monotonic()
+            _deliver_notification(
+                observation,
+                output,
+                [
+                    (subscriber, result)
+                    for subscriber, result in decoded
+                    if subscriber in observation.subscribers
+                ],
+            )
+            self._notification_stats.record(monotonic() - started_at)
+
+        observation.delivery = delivery = asyncio.create_task(deliver())
+
+        def done(task: asyncio.Task[None]) -> None:
+            """Forget the last delivery once it is done."""
+            if observation.delivery is task:
+                observation.delivery = None
+
+        delivery.add_done_callback(done)
+
+    def _schedule_renewal(self, observation: _Observation) -> None:
+        """Schedule renewing an observation before its duration runs out."""
+        observation.cancel_renewal()
+        if not self._renew_observations or observation.duration <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        delay = observation.duration * random.uniform(0.7, 0.9)
+        observation.renew_at = loop.time() + delay
+        observation.renew_handle = loop.call_later(
+            delay, self._start_renewal, observation
+        )
+
+    def _start_renewal(self, observation: _Observation) -> None:
+        """Start renewing an observation."""
+        observation.renew_handle = None
+        observation.renew_at = None
+        task = asyncio.create_task(self._renew(observation))
+        self._renew_tasks.add(task)
+        task.add_done_callback(self._renew_tasks.discard)
+
+    async def _renew(self, observation: _Observation) -> None:
+        """Renew an observation and stop the one it replaces."""
+        if self._observations.get(observation.path) is not observation:
+            return
+
+        previous = observation.client_observation
+        _LOGGER.debug("Renewing observation %s %s", self._host, observation.path)
+        try:
+            await self._start_observation(observation)
+        except RequestError as exc:
+            _LOGGER.debug("Failed to renew observation %s: %s", observation.path, exc)
+            self._end_observation(observation, exc)
+            return
+
+        if previous is not None:
+            self._forget_client_observation(previous)
+            if not previous.cancelled:
+                previous.cancel()
+
+    async def _join(self, observation: _Observation, api_command: Command[Any]) -> None:
+        """Pass the result of a started observation to a new subscriber."""
+        if not observation.is_stale(asyncio.get_running_loop().time()):
+            api_command.process_result(observation.output)
+            return
+
+        # The gateway may have dropped the observation silently.
+        try:
+            await self._refresh(observation)
+        except BaseException:
+            observation.remove_subscriber(api_command)
+            raise
+
+    async def _refresh(self, observation: _Observation) -> None:
+        """Renew a stale observation, once for all the commands joining it."""
+        if observation.refresh is None:
+            observation.refresh = task = asyncio.create_task(self._renew(observation))
+            self._renew_tasks.add(task)
+
+            def done(task: asyncio.Task[None]) -> None:
+                """Forget the refresh once it is done."""
+                self._renew_tasks.discard(task)
+                observation.refresh = None
+
+            task.add_done_callback(done)
+        await asyncio.shield(observation.refresh)
+
+    def renewal_timeline(self) -> list[tuple[str, float]]:
+        """Return the path and seconds until renewal of observations.
+
+        The list is ordered by the time of renewal.
+        """
+        now = asyncio.get_running_loop().time()
+        return sorted(
+            (
+                (observation.path, observation.renew_at - now)
+                for observation in self._observations.values()
+                if observation.renew_at is not None
+            ),
+            key=lambda item: item[1],
+        )
+
+    def _forget_client_observation(self, client_observation: ClientObservation) -> None:
+        """Drop the error callback saved for an aiocoap observation."""
+        with suppress(ValueError):
+            self._observations_err_callbacks.remove(client_observation.error)
+
+    def _end_observation(self, observation: _Observation, exc: Exception) -> None:
+        """Forget a failed observation and tell its subscribers."""
+        observation.cancel_renewal()
+        if observation.client_observation is not None:
+            self._forget_client_observation(observation.client_observation)
+        if self._observations.get(observation.path) is observation:
+            del self._observations[observation.path]
+        for subscriber in observation.subscribers:
+            if err_callback := subscriber.err_callback:
+                err_callback(exc)
+
+    def unobserve(self, api_command: Command[Any]) -> None:
+        """Stop observing for the given observe command.
+
+        The observation is cancelled when its last subscriber is gone.
+        """
+        path = api_command.path_str
+        if (observation := self._observations.get(path)) is None:
+            return
+        observation.remove_subscriber(api_command)
+        if observation.subscribers:
+            return
+
+        _LOGGER.debug("Cancelling observation %s %s", self._host, path)
+        del self._observations[path]
+        observation.cancel_renewal()
+        if (client_observation := observation.client_observation) is not None:
+            self._forget_client_observation(client_observation)
+            if not client_observation.cancelled:
+                client_observation.cancel()
 
     async def generate_psk(self, security_key: str) -> str:
         """Generate and set a psk from the security key."""
@@ -322,6 +903,132 @@ class APIFactory:
         )
 
 
+class _Observation:
+    """Represent the observation of a path, shared by its subscribers."""
+
+    def __init__(
+        self, path: str, url: str, duration: int, timeout: float | None
+    ) -> None:
+        """Create object of class."""
+        self.path = path
+        self.url = url
+        self.duration = duration
+        self.timeout = timeout
+        self.subscribers: list[Command[Any]] = []
+        self.client_observation: ClientObservation | None = None
+        self.output: list[Any] | dict[Any, Any] | str | None = None
+        # Set when the observation has been started for the first time.
+        self.ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        # The protocol generation the observation was started with.
+        self.generation = -1
+        # The event loop time the observation will be renewed at.
+        self.renew_at: float | None = None
+        self.renew_handle: asyncio.TimerHandle | None = None
+        # The last notification being decoded outside of the event loop.
+        self.delivery: asyncio.Task[None] | None = None
+        # The event loop time of the last response or notification.
+        self.last_notification: float | None = None
+        # The renewal of a stale observation in progress.
+        self.refresh: asyncio.Task[None] | None = None
+
+    def remove_subscriber(self, api_command: Command[Any]) -> None:
+        """Remove a subscriber if it's subscribed."""
+        if api_command in self.subscribers:
+            self.subscribers.remove(api_command)
+
+    def is_stale(self, now: float) -> bool:
+        """Return if nothing was heard for longer than the observe duration."""
+        return (
+            self.duration > 0
+            and self.last_notification is not None
+            and now - self.last_notification > self.duration
+        )
+
+    def cancel_renewal(self) -> None:
+        """Cancel a scheduled renewal."""
+        if self.renew_handle is not None:
+            self.renew_handle.cancel()
+        self.renew_handle = None
+        self.renew_at = None
+
+
+class NotificationStats:
+    """Event loop time spent handling notifications of observations."""
+
+    def __init__(self) -> None:
+        """Create object of class."""
+        self.count = 0
+        self.total_loop_time = 0.0
+        self.max_loop_time = 0.0
+
+    def record(self, loop_time: float) -> None:
+        """Record the event loop time of a single notification."""
+        self.count += 1
+        self.total_loop_time += loop_time
+        self.max_loop_time = max(self.max_loop_time, loop_time)
+
+    @property
+    def mean_loop_time(self) -> float:
+        """Return the mean event loop time in seconds."""
+        if not self.count:
+            return 0.0
+        return self.total_loop_time / self.count
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return (
+            f"<NotificationStats notifications: {self.count}, "
+            f"loop time: {self.mean_loop_time:.6f}s mean "
+            f"{self.max_loop_time:.6f}s max>"
+        )
+
+
+def _decode_notification(
+    subscribers: list[Command[Any]],
+    output: list[Any] | dict[Any, Any] | str | None,
+) -> list[tuple[Command[Any], Any]]:
+    """Decode a notification for every subscriber that can decode it."""
+    decoded = []
+    for subscriber in subscribers:
+        try:
+            decoded.append((subscriber, subscriber.decode_result(output)))
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error decoding notification for %s", subscriber)
+    return decoded
+
+
+def _deliver_notification(
+    observation: _Observation,
+    output: list[Any] | dict[Any, Any] | str | None,
+    decoded: list[tuple[Command[Any], Any]],
+) -> None:
+    """Pass a decoded notification to the subscribers of an observation."""
+    observation.output = output
+    observation.last_notification = asyncio.get_running_loop().time()
+    for subscriber, result in decoded:
+        try:
+            subscriber.apply_result(output, result)
+        except Exception:  # pylint: disable=broad-except
+            # Don't let one subscriber break the others.
+            _LOGGER.exception("Error processing notification for %s", subscriber)
+
+
+class _QueuedWrite:
+    """Represent a write waiting for the previous write to the same path."""
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        """Create object of class."""
+        self.data = data
+        self.future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+
+
+def _build_message(code: Code, url: str, payload: bytes | None) -> Message:
+    """Build the message for a request."""
+    if payload is None:
+        return Message(code=code, uri=url)
+    return Message(code=code, uri=url, payload=payload)
+
+
 def _process_output(
     res: Message, parse_json: bool = True
 ) -> list[Any] | dict[Any, Any] | str | None:
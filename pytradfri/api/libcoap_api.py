@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+import codecs
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
+import os
+import selectors
 import subprocess
-from time import time
+from time import monotonic, time
 from typing import TYPE_CHECKING, Any, Protocol, cast, overload
 
 from ..command import Command, T
@@ -16,6 +21,7 @@ _LOGGER = logging.getLogger(__name__)
 
 CLIENT_ERROR_PREFIX = "4."
 SERVER_ERROR_PREFIX = "5."
+OBSERVE_CHUNK_SIZE = 65536
 
 
 class APIRequestProtocol(Protocol):
@@ -36,7 +42,12 @@ class APIRequestProtocol(Protocol):
 
 
 class APIFactory:
-    """APIFactory."""
+    """APIFactory.
+
+    With max_workers above 1 the commands of a list request are executed
+    in parallel by a pool of that many threads, each running its own
+    coap-client process.
+    """
 
     def __init__(
         self,
@@ -44,12 +55,17 @@ class APIFactory:
         psk_id: str = "pytradfri",
         psk: str | None = None,
         timeout: int = 10,
+        *,
+        max_workers: int = 1,
     ) -> None:
         """Create object of class."""
+        if max_workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
         self._host = host
         self._psk_id = psk_id
         self._psk = psk
         self._timeout = timeout  # seconds
+        self._max_workers = max_workers
 
     @property
     def psk(self) -> str | None:
@@ -86,7 +102,7 @@ class APIFactory:
 
         method = api_command.method
         path = api_command.path
-        data = api_command.data
+        payload = api_command.payload
         parse_json = api_command.parse_json
         url = api_command.url(self._host)
 
@@ -102,11 +118,11 @@ class APIFactory:
             "universal_newlines": True,
         }
 
-        if data is not None:
-            kwargs["input"] = json.dumps(data)
+        if payload is not None:
+            kwargs["input"] = payload
             command.append("-f")
             command.append("-")
-            _LOGGER.debug("Executing %s %s %s: %s", self._host, method, path, data)
+            _LOGGER.debug("Executing %s %s %s: %s", self._host, method, path, payload)
         else:
             _LOGGER.debug("Executing %s %s %s", self._host, method, path)
 
@@ -138,6 +154,9 @@ class APIFactory:
         if not isinstance(api_commands, list):
             return self._execute(api_commands, timeout=timeout)
 
+        if self._max_workers > 1 and len(api_commands) > 1:
+            return self._execute_parallel(api_commands, timeout=timeout)
+
         command_results = []
 
         for api_command in api_commands:
@@ -146,13 +165,35 @@ class APIFactory:
 
         return command_results
 
-    def _observe(self, api_command: Command[T]) -> None:
-        """Observe an endpoint."""
-        path = api_command.path
+    def _execute_parallel(
+        self, api_commands: list[Command[T]], *, timeout: int | None = None
+    ) -> list[T]:
+        """Execute the commands in parallel.
+
+        The results are returned in the order of the commands. If commands
+        fail, the error of the first failing command in the list is raised
+        and commands that haven't started yet are not executed.
+        """
+        with ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(api_commands)),
+            thread_name_prefix="pytradfri",
+        ) as executor:
+            futures = [
+                executor.submit(self._execute, api_command, timeout=timeout)
+                for api_command in api_commands
+            ]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _start_observe(self, api_command: Command[Any]) -> subprocess.Popen[bytes]:
+        """Start a coap-client process observing the endpoint of the command."""
         if (duration := api_command.observe_duration) <= 0:
             raise ValueError("Observation duration has to be greater than 0.")
         url = api_command.url(self._host)
-        err_callback = api_command.err_callback
 
         command = self._base_command("get") + [
             "-s",
@@ -163,28 +204,36 @@ class APIFactory:
         ]
 
         try:
-            proc: subprocess.Popen[str] = subprocess.Popen(  # pylint: disable=consider-using-with
+            return subprocess.Popen(
                 command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL,
-                universal_newlines=True,
             )
-        except subprocess.CalledProcessError as exc:
+        except OSError as exc:
             msg = f"Error executing request: {exc}"
             raise RequestError(msg) from None
 
-        output = ""
-        open_obj = 0
+    def _observe(self, api_command: Command[T]) -> None:
+        """Observe an endpoint."""
+        path = api_command.path
+        err_callback = api_command.err_callback
+        proc = self._start_observe(api_command)
+
+        if TYPE_CHECKING:
+            assert proc.stdout
+        fileno = proc.stdout.fileno()
+        framer = ObserveStreamFramer()
         start = time()
 
-        def read_stdout() -> str:
-            """Read from stdout."""
-            if TYPE_CHECKING:
-                assert proc.stdout
-            return cast(str, proc.stdout.read(1))
+        def read_stdout() -> bytes:
+            """Read the output that is available from stdout."""
+            return os.read(fileno, OBSERVE_CHUNK_SIZE)
+
+        for data in iter(read_stdout, b""):
+            for message in framer.feed(data):
+                api_command.process_result(message)
 
-        for data in iter(read_stdout, ""):
-            if data == "\n":
+            if framer.stopped:
                 _LOGGER.debug(
                     "Observing stopped for %s after %.1fs", path, time() - start
                 )
@@ -192,16 +241,9 @@ class APIFactory:
                     err_callback(RequestError("Observing stopped."))
                 break
 
-            if data == "{":
-                open_obj += 1
-            elif data == "}":
-                open_obj -= 1
-
-            output += data
-
-            if open_obj == 0:
-                api_command.process_result(_process_output(output))
-                output = ""
+    def observe_supervisor(self, *, restart_delay: float = 1.0) -> ObserveSupervisor:
+        """Return a supervisor to observe many endpoints from one thread."""
+        return ObserveSupervisor(self._start_observe, restart_delay=restart_delay)
 
     def generate_psk(self, security_key: str) -> str:
         """Generate and set a psk from the security key."""
@@ -222,6 +264,254 @@ class APIFactory:
         return self._psk
 
 
+class ObserveStreamFramer:
+    """Split the output of an observing coap-client into messages.
+
+    The output is fed in chunks as it is read and decoded incrementally,
+    so that large payloads are not scanned or copied once per character.
+    A newline between messages means that coap-client stopped observing.
+    """
+
+    def __init__(self) -> None:
+        """Create object of class."""
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._incomplete = False
+        self.stopped = False
+
+    def feed(self, data: bytes) -> list[Any]:
+        """Feed a chunk of output and return the complete messages in it."""
+        if self.stopped:
+            return []
+
+        text = self._text_decoder.decode(data)
+        self._buffer += text
+        if self._incomplete and "}" not in text and "]" not in text:
+            # A message can't be complete before it is closed.
+            return []
+
+        buffer = self._buffer
+        messages: list[Any] = []
+        pos = 0
+        self._incomplete = False
+
+        while pos < len(buffer):
+            if (char := buffer[pos]) == "\n":
+                self.stopped = True
+                break
+            if char.isspace():
+                pos += 1
+                continue
+            if char in "{[":
+                try:
+                    message, pos = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Wait for the rest of the message.
+                    self._incomplete = True
+                    break
+                messages.append(message)
+                continue
+
+            # Not a JSON message, like an error response. Its line ends
+            # the output.
+            if (end := buffer.find("\n", pos)) == -1:
+                break
+            self.stopped = True
+            self._buffer = ""
+            messages.append(_process_output(buffer[pos:end]))
+            return messages
+
+        self._buffer = "" if self.stopped else buffer[pos:]
+        return messages
+
+
+class _Observer:
+    """Represent an observing coap-client process of a supervisor."""
+
+    def __init__(self, api_command: Command[Any]) -> None:
+        """Create object of class."""
+        self.api_command = api_command
+        self.proc: subprocess.Popen[bytes] | None = None
+        self.framer = ObserveStreamFramer()
+        self.started = 0.0
+        self.restart_at: float | None = None
+
+
+class ObserveSupervisor:
+    """Observe many endpoints with coap-client processes from one thread.
+
+    The output of all processes is read through a selector and dispatched
+    to the commands. Processes that stop, because the observation expired,
+    the process crashed or printed unexpected output, or that fail to
+    start, are restarted after restart_delay seconds.
+    Commands are only added and removed from the thread running the
+    supervisor, stop can be called from any thread.
+    """
+
+    def __init__(
+        self,
+        start_process: Callable[[Command[Any]], subprocess.Popen[bytes]],
+        *,
+        restart_delay: float = 1.0,
+    ) -> None:
+        """Create object of class."""
+        self._start_process = start_process
+        self._restart_delay = restart_delay
+        self._observers: dict[Command[Any], _Observer] = {}
+        self._selector = selectors.DefaultSelector()
+        self._wake_read, self._wake_write = os.pipe()
+        self._selector.register(self._wake_read, selectors.EVENT_READ)
+        self._stop_requested = False
+        self.restarts = 0
+
+    @property
+    def observing(self) -> int:
+        """Return the number of running observe processes."""
+        return sum(1 for observer in self._observers.values() if observer.proc)
+
+    def add(self, api_command: Command[Any]) -> None:
+        """Start observing the endpoint of the command."""
+        if api_command in self._observers:
+            return
+        observer = _Observer(api_command)
+        self._observers[api_command] = observer
+        self._start(observer)
+
+    def remove(self, api_command: Command[Any]) -> None:
+        """Stop observing the endpoint of the command."""
+        if (observer := self._observers.pop(api_command, None)) is not None:
+            self._stop_process(observer)
+
+    def _start(self, observer: _Observer) -> None:
+        """Start the process of an observer."""
+        observer.restart_at = None
+        try:
+            proc = self._start_process(observer.api_command)
+        except (OSError, RequestError) as exc:
+            _LOGGER.debug(
+                "Failed to start observing %s: %s", observer.api_command.path, exc
+            )
+            observer.restart_at = monotonic() + self._restart_delay
+            return
+
+        if TYPE_CHECKING:
+            assert proc.stdout
+        observer.proc = proc
+        observer.framer = ObserveStreamFramer()
+        observer.started = monotonic()
+        self._selector.register(proc.stdout, selectors.EVENT_READ, observer)
+
+    def _stop_process(self, observer: _Observer) -> None:
+        """Stop the process of an observer."""
+        if (proc := observer.proc) is None:
+            return
+        observer.proc = None
+        if TYPE_CHECKING:
+            assert proc.stdout
+        self._selector.unregister(proc.stdout)
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+        proc.stdout.close()
+
+    def _ended(self, observer: _Observer, exc: RequestError | None = None) -> None:
+        """Handle the process of an observer ending."""
+        api_command = observer.api_command
+        self._stop_process(observer)
+        _LOGGER.debug(
+            "Observing stopped for %s after %.1fs",
+            api_command.path,
+            monotonic() - observer.started,
+        )
+
+        if exc is None:
+            self.restarts += 1
+            observer.restart_at = monotonic() + self._restart_delay
+            return
+
+        # The gateway rejected the observation, restarting won't help.
+        del self._observers[api_command]
+        if api_command.err_callback:
+            api_command.err_callback(exc)
+
+    def _read(self, observer: _Observer) -> None:
+        """Read and dispatch the available output of an observer."""
+        if TYPE_CHECKING:
+            assert observer.proc and observer.proc.stdout
+        if not (data := os.read(observer.proc.stdout.fileno(), OBSERVE_CHUNK_SIZE)):
+            self._ended(observer)
+            return
+
+        try:
+            messages = observer.framer.feed(data)
+        except RequestError as exc:
+            self._ended(observer, exc)
+            return
+        except ValueError as exc:
+            # Output that isn't a response, like a warning of coap-client.
+            _LOGGER.warning(
+                "Unexpected output observing %s: %s", observer.api_command.path, exc
+            )
+            self._ended(observer)
+            return
+
+        for message in messages:
+            try:
+                observer.api_command.process_result(message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Failed to process notification for %s", observer.api_command.path
+                )
+
+        if observer.framer.stopped:
+            self._ended(observer)
+
+    def run_once(self, timeout: float | None = None) -> None:
+        """Wait up to timeout seconds for output and dispatch it."""
+        now = monotonic()
+        for observer in list(self._observers.values()):
+            if observer.restart_at is not None and observer.restart_at <= now:
+                self._start(observer)
+
+        restarts = [
+            observer.restart_at
+            for observer in self._observers.values()
+            if observer.restart_at is not None
+        ]
+        if restarts:
+            next_restart = max(0.0, min(restarts) - now)
+            timeout = next_restart if timeout is None else min(timeout, next_restart)
+
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj == self._wake_read:
+                os.read(self._wake_read, OBSERVE_CHUNK_SIZE)
+                continue
+            observer = key.data
+            if observer.proc is not None:
+                self._read(observer)
+
+    def run(self) -> None:
+        """Dispatch output until stop is called."""
+        while not self._stop_requested:
+            self.run_once()
+        self._stop_requested = False
+
+    def stop(self) -> None:
+        """Stop running, from any thread."""
+        self._stop_requested = True
+        os.write(self._wake_write, b"\0")
+
+    def close(self) -> None:
+        """Stop all observe processes and release the selector."""
+        for observer in self._observers.values():
+            self._stop_process(observer)
+        self._observers.clear()
+        self._selector.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+
 def _process_output(
     output: str, parse_json: bool = True
 ) -> list[Any] | dict[Any, Any] | str | None:
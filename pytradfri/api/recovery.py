@@ -0,0 +1,104 @@
+"""Recovery from failing requests."""
+
+from __future__ import annotations
+
+from collections import deque
+from time import monotonic
+
+
+class RecoveryPolicy:
+    """Decide when failing requests warrant a reset of the protocol.
+
+    A single resource timing out, like a slow bulb, is failed or retried
+    locally. The protocol is reset when requests to failure_threshold
+    different resources time out within window seconds, after
+    consecutive_threshold failures without a success in between, when
+    requests kept failing without a success for window seconds since the
+    first failure, or when the gateway itself didn't answer, so that a
+    dead session recovers even if only a few resources are used.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 3,
+        consecutive_threshold: int = 5,
+        window: float = 60.0,
+        retries: int = 0,
+    ) -> None:
+        """Create object of class."""
+        if failure_threshold < 1:
+            raise ValueError("The failure threshold must be at least 1.")
+        if consecutive_threshold < 1:
+            raise ValueError("The consecutive threshold must be at least 1.")
+        if retries < 0:
+            raise ValueError("The number of retries can't be negative.")
+        self.failure_threshold = failure_threshold
+        self.consecutive_threshold = consecutive_threshold
+        self.window = window
+        self.retries = retries
+        self._failures: deque[tuple[float, str]] = deque()
+        self._consecutive = 0
+        # Time of the first failure since the last success.
+        self._streak_start: float | None = None
+        # Counters
+        self.failures = 0
+        self.retried = 0
+        self.escalations = 0
+        self.resets = 0
+
+    def record_failure(self, path: str, *, unanswered: bool = False) -> bool:
+        """Record a failed request to a path.
+
+        unanswered means that the gateway didn't acknowledge the request,
+        like when retransmissions are exhausted, as opposed to a resource
+        being slow to respond. Return True if the protocol should be reset.
+        """
+        now = monotonic()
+        self.failures += 1
+        self._consecutive += 1
+        self._failures.append((now, path))
+        if self._streak_start is None:
+            # Idle time before the failure isn't a sign of a dead session.
+            self._streak_start = now
+        while self._failures[0][0] < now - self.window:
+            self._failures.popleft()
+
+        if (
+            not unanswered
+            and self._consecutive < self.consecutive_threshold
+            and now - self._streak_start <= self.window
+            and len({path for _, path in self._failures}) < self.failure_threshold
+        ):
+            return False
+
+        self._clear()
+        self.escalations += 1
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        self._consecutive = 0
+        self._streak_start = None
+
+    def record_retry(self) -> None:
+        """Record a retried request."""
+        self.retried += 1
+
+    def record_reset(self) -> None:
+        """Record a reset of the protocol, whatever the reason."""
+        self.resets += 1
+        self._clear()
+
+    def _clear(self) -> None:
+        """Forget the failures, the session starts over."""
+        self._failures.clear()
+        self._consecutive = 0
+        self._streak_start = None
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return (
+            f"<RecoveryPolicy failures: {self.failures}, retried: {self.retried}, "
+            f"escalations: {self.escalations}, resets: {self.resets}>"
+        )
@@ -0,0 +1,233 @@
+"""Scheduling of requests sent to the gateway."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import math
+from time import monotonic
+
+
+class RequestScheduler:
+    """Limit the number of requests in flight.
+
+    Requests waiting for a slot are served in the order they arrived.
+    A limit of None means that the number of requests is not limited.
+    """
+
+    def __init__(self, limit: int | None = None) -> None:
+        """Create object of class."""
+        self._limit: int | None = None
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self.limit = limit
+
+    @property
+    def limit(self) -> int | None:
+        """Return the maximum number of requests in flight."""
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int | None) -> None:
+        """Set the maximum number of requests in flight."""
+        if value is not None and value < 1:
+            raise ValueError("The request limit must be at least 1.")
+        self._limit = value
+        self._wake_waiters()
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests in flight."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _has_capacity(self) -> bool:
+        """Return if another request may be sent."""
+        return self._limit is None or self._in_flight < self._limit
+
+    def _wake_waiters(self) -> None:
+        """Hand free slots to waiting requests in arrival order."""
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                # The waiting request was cancelled.
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        if not self._waiters and self._has_capacity():
+            self._in_flight += 1
+            return
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed to us right before we got cancelled.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Release a slot."""
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot while the context is active."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdaptiveWindow:
+    """Tune the limit of a scheduler from observed round trip times.
+
+    The window grows additively, by about one request per round trip,
+    while round trip times stay close to the lowest observed round trip
+    time. It shrinks multiplicatively when a request times out.
+    """
+
+    def __init__(
+        self,
+        scheduler: RequestScheduler,
+        *,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        latency_tolerance: float = 1.5,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        """Create object of class."""
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(
+                "The window must satisfy 1 <= minimum <= initial <= maximum."
+            )
+        self._scheduler = scheduler
+        self._minimum = minimum
+        self._maximum = maximum
+        self._latency_tolerance = latency_tolerance
+        self._decrease_factor = decrease_factor
+        self._window = float(initial)
+        self._base_rtt: float | None = None
+        self._last_decrease = -math.inf
+        self.increases = 0
+        self.decreases = 0
+        scheduler.limit = initial
+
+    @property
+    def window(self) -> int:
+        """Return the current number of requests allowed in flight."""
+        return int(self._window)
+
+    @property
+    def base_rtt(self) -> float | None:
+        """Return the reference round trip time in seconds."""
+        return self._base_rtt
+
+    def _apply(self) -> None:
+        """Apply the window to the scheduler."""
+        self._scheduler.limit = self.window
+
+    def on_success(self, rtt: float) -> None:
+        """Register the round trip time of a successful request."""
+        if self._base_rtt is None or rtt < self._base_rtt:
+            self._base_rtt = rtt
+        else:
+            # Let the reference drift slowly so that a permanent change in
+            # the network does not freeze the window.
+            self._base_rtt += (rtt - self._base_rtt) * 0.01
+
+        if rtt > self._base_rtt * self._latency_tolerance:
+            # The gateway is queueing requests, hold the window.
+            return
+
+        if self._window >= self._maximum:
+            return
+
+        previous = self.window
+        self._window = min(float(self._maximum), self._window + 1 / self._window)
+        if self.window != previous:
+            self.increases += 1
+            self._apply()
+
+    def on_timeout(self, started_at: float) -> None:
+        """Register a request, started at the given monotonic time, timing out.
+
+        Requests that were already in flight when the window was last
+        decreased do not decrease it again.
+        """
+        if started_at < self._last_decrease:
+            return
+
+        self._last_decrease = monotonic()
+        self._window = max(float(self._minimum), self._window * self._decrease_factor)
+        self.decreases += 1
+        self._apply()
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return (
+            f"<AdaptiveWindow window: {self.window}, "
+            f"increases: {self.increases}, decreases: {self.decreases}>"
+        )
+
+
+class BatchStats:
+    """Timing statistics of a batch of requests.
+
+    Queue wait is the time a request waited for a slot in the scheduler.
+    Service time is the time from sending a request until it completed.
+    """
+
+    def __init__(self) -> None:
+        """Create object of class."""
+        self.count = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.total_service_time = 0.0
+        self.max_service_time = 0.0
+
+    def record(self, queue_wait: float, service_time: float) -> None:
+        """Record the timings of a single request."""
+        self.count += 1
+        self.total_queue_wait += queue_wait
+        self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+        self.total_service_time += service_time
+        self.max_service_time = max(self.max_service_time, service_time)
+
+    @property
+    def mean_queue_wait(self) -> float:
+        """Return the mean queue wait in seconds."""
+        if not self.count:
+            return 0.0
+        return self.total_queue_wait / self.count
+
+    @property
+    def mean_service_time(self) -> float:
+        """Return the mean service time in seconds."""
+        if not self.count:
+            return 0.0
+        return self.total_service_time / self.count
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return (
+            f"<BatchStats requests: {self.count}, "
+            f"queue wait: {self.mean_queue_wait:.3f}s mean "
+            f"{self.max_queue_wait:.3f}s max, "
+            f"service time: {self.mean_service_time:.3f}s mean "
+            f"{self.max_service_time:.3f}s max>"
+        )
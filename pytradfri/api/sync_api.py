@@ -0,0 +1,206 @@
+"""Synchronous COAP implementation using persistent aiocoap sessions.
+
+The sessions live on an event loop running in a background thread, so
+every request reuses an established DTLS session instead of starting a
+coap-client process and doing a handshake per command. The commands of
+a list request are sent concurrently. Observe callbacks are called from
+the background thread, so they can't wait for a request: hand the
+request to another thread, like a concurrent.futures.ThreadPoolExecutor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine
+import logging
+import threading
+from types import TracebackType
+from typing import Any, Protocol, TypeVar, overload
+
+from ..command import Command, T
+from .aiocoap_api import APIFactory as AsyncAPIFactory
+
+_LOGGER = logging.getLogger(__name__)
+
+_R = TypeVar("_R")
+
+
+class APIRequestProtocol(Protocol):
+    """Represent the protocol for the APIFactory request method."""
+
+    @overload
+    def __call__(self, api_commands: Command[T], timeout: int | None = None) -> T: ...
+
+    @overload
+    def __call__(
+        self, api_commands: list[Command[T]], timeout: int | None = None
+    ) -> list[T]: ...
+
+    def __call__(
+        self, api_commands: Command[T] | list[Command[T]], timeout: int | None = None
+    ) -> T | list[T]:
+        """Define the signature of the request method."""
+
+
+class _Session:
+    """Represent a session with the gateway."""
+
+    def __init__(self, factory: AsyncAPIFactory) -> None:
+        """Create object of class."""
+        self.factory = factory
+        self.in_flight = 0
+
+
+class APIFactory:
+    """APIFactory.
+
+    Requests are sent over a pool of pool_size persistent sessions. Each
+    request uses the least busy session, so threads sharing the factory
+    don't wait for each other. The session_options, like max_in_flight,
+    are passed to the aiocoap APIFactory of each session.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        psk_id: str = "pytradfri",
+        psk: str | None = None,
+        timeout: int = 10,
+        *,
+        pool_size: int = 1,
+        **session_options: Any,
+    ) -> None:
+        """Create object of class."""
+        if pool_size < 1:
+            raise ValueError("The pool size must be at least 1.")
+        self._host = host
+        self._psk_id = psk_id
+        self._psk = psk
+        self._timeout = timeout  # seconds
+        self._pool_size = pool_size
+        self._session_options = session_options
+        self._sessions: list[_Session] = []
+        self._sessions_lock = asyncio.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name=f"pytradfri-{host}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def psk(self) -> str | None:
+        """Return psk."""
+        return self._psk
+
+    @psk.setter
+    def psk(self, value: str) -> None:
+        """Set psk."""
+        self._psk = value
+        # The sessions were set up with the previous psk.
+        self._run(self._close_sessions())
+
+    def _run(self, coro: Coroutine[Any, Any, _R]) -> _R:
+        """Run a coroutine on the event loop of the sessions and wait for it."""
+        if self._loop.is_closed():
+            coro.close()
+            raise RuntimeError("The APIFactory is closed.")
+        if threading.current_thread() is self._thread:
+            # Waiting would block the loop that runs the coroutine.
+            coro.close()
+            raise RuntimeError(
+                "The APIFactory can't be used from its own thread, like in an "
+                "observe callback. Make the request from another thread."
+            )
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get_session(self) -> _Session:
+        """Return the least busy session, set up the sessions if needed."""
+        async with self._sessions_lock:
+            if not self._sessions:
+                if self._psk is None:
+                    raise RuntimeError("You must enter a PSK.")
+                _LOGGER.debug(
+                    "Setting up %s sessions with %s", self._pool_size, self._host
+                )
+                for _ in range(self._pool_size):
+                    factory = await AsyncAPIFactory.init(
+                        self._host,
+                        psk_id=self._psk_id,
+                        psk=self._psk,
+                        **self._session_options,
+                    )
+                    self._sessions.append(_Session(factory))
+
+        return min(self._sessions, key=lambda session: session.in_flight)
+
+    async def _close_sessions(self) -> None:
+        """Shut down the sessions."""
+        async with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+            for session in sessions:
+                await session.factory.shutdown()
+
+    async def _request(
+        self, api_commands: Command[T] | list[Command[T]], timeout: int
+    ) -> T | list[T]:
+        """Make a request using a session."""
+        session = await self._get_session()
+        session.in_flight += 1
+        try:
+            return await session.factory.request(api_commands, timeout)
+        finally:
+            session.in_flight -= 1
+
+    @overload
+    def request(self, api_commands: Command[T], timeout: int | None = None) -> T: ...
+
+    @overload
+    def request(
+        self, api_commands: list[Command[T]], timeout: int | None = None
+    ) -> list[T]: ...
+
+    def request(
+        self, api_commands: Command[T] | list[Command[T]], timeout: int | None = None
+    ) -> T | list[T]:
+        """Make a request. Timeout is in seconds."""
+        if timeout is None:
+            timeout = self._timeout
+        return self._run(self._request(api_commands, timeout))
+
+    def generate_psk(self, security_key: str) -> str:
+        """Generate and set a psk from the security key."""
+        if not self._psk:
+
+            async def generate() -> str:
+                """Generate the psk with a session of its own."""
+                factory = await AsyncAPIFactory.init(self._host, psk_id=self._psk_id)
+                try:
+                    return await factory.generate_psk(security_key)
+                finally:
+                    await factory.shutdown()
+
+            self._psk = self._run(generate())
+
+        return self._psk
+
+    def close(self) -> None:
+        """Shut down the sessions and stop the background event loop."""
+        if self._loop.is_closed():
+            return
+        self._run(self._close_sessions())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> APIFactory:
+        """Enter the context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the factory when leaving the context manager."""
+        self.close()
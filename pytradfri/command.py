@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
+import json
 from typing import Any, Generic, TypeVar
 
 T = TypeVar("T")
@@ -11,6 +12,25 @@ T = TypeVar("T")
 class Command(Generic[T]):
     """The object for coap commands."""
 
+    __slots__ = (
+        "_data",
+        "_decode_result",
+        "_err_callback",
+        "_method",
+        "_observe",
+        "_observe_duration",
+        "_parse_json",
+        "_path",
+        "_path_str",
+        "_payload",
+        "_payload_bytes",
+        "_process_result",
+        "_raw_result",
+        "_result",
+        "_url",
+        "_url_host",
+    )
+
     def __init__(
         self,
         method: str,
@@ -22,13 +42,23 @@ class Command(Generic[T]):
         observe_duration: int = 0,
         process_result: Callable[..., T] | None = None,
         err_callback: Callable[[Exception], None] | None = None,
+        decode_result: Callable[[Any], Any] | None = None,
     ) -> None:
-        """Create object of class."""
+        """Create object of class.
+
+        decode_result is an optional step converting the raw result before
+        it is passed to process_result. It must not have side effects, so
+        that it can be run outside of the event loop.
+
+        The serialized payload, path and url are cached. Assign data and
+        path to change them, changes made in place are not detected.
+        """
         self._method = method
         self._path = path
         self._data = data
         self._parse_json = parse_json
         self._process_result = process_result
+        self._decode_result = decode_result
         self._err_callback = err_callback
         self._observe = observe
         self._observe_duration = observe_duration
@@ -36,6 +66,11 @@ class Command(Generic[T]):
         # If there's no process_result callback, the result will always be None.
         # And in that case T will also be None.
         self._result: T = None  # type: ignore[assignment]
+        self._payload: str | None = None
+        self._payload_bytes: bytes | None = None
+        self._path_str: str | None = None
+        self._url_host: str | None = None
+        self._url: str | None = None
 
     @property
     def method(self) -> str:
@@ -47,11 +82,43 @@ class Command(Generic[T]):
         """Return path."""
         return self._path
 
+    @path.setter
+    def path(self, value: list[str]) -> None:
+        """Set path."""
+        self._path = value
+        self._path_str = None
+        self._url_host = self._url = None
+
     @property
     def data(self) -> dict[str, Any] | None:
         """Return data."""
         return self._data
 
+    @data.setter
+    def data(self, value: Any | None) -> None:
+        """Set data."""
+        self._data = value
+        self._payload = None
+        self._payload_bytes = None
+
+    @property
+    def payload(self) -> str | None:
+        """Return data serialized as json."""
+        if self._payload is None and self._data is not None:
+            self._payload = json.dumps(self._data)
+        return self._payload
+
+    @property
+    def payload_bytes(self) -> bytes | None:
+        """Return data serialized as utf-8 encoded json."""
+        if self._payload_bytes is None and (payload := self.payload) is not None:
+            self._payload_bytes = payload.encode("utf-8")
+        return self._payload_bytes
+
+    def serialize_payload(self) -> bytes | None:
+        """Serialize the data now, return the payload bytes."""
+        return self.payload_bytes
+
     @property
     def parse_json(self) -> bool:
         """Json parsing result."""
@@ -59,8 +126,20 @@ class Command(Generic[T]):
 
     def process_result(self, result: list[Any] | dict[Any, Any] | str | None) -> T:
         """Process and set result."""
+        return self.apply_result(result, self.decode_result(result))
+
+    def decode_result(self, result: list[Any] | dict[Any, Any] | str | None) -> Any:
+        """Decode the raw result, without side effects."""
+        if self._decode_result:
+            return self._decode_result(result)
+        return result
+
+    def apply_result(
+        self, result: list[Any] | dict[Any, Any] | str | None, decoded: Any
+    ) -> T:
+        """Process and set the result decoded by decode_result."""
         if self._process_result:
-            self._result = self._process_result(result)
+            self._result = self._process_result(decoded)
 
         self._raw_result = result
         return self._result
@@ -93,11 +172,68 @@ class Command(Generic[T]):
     @property
     def path_str(self) -> str:
         """Return coap path."""
-        return "/".join(str(v) for v in self._path)
+        if self._path_str is None:
+            self._path_str = "/".join(str(v) for v in self._path)
+        return self._path_str
 
     def url(self, host: str) -> str:
         """Generate url for coap client."""
-        return f"coaps://{host}:5684/{self.path_str}"
+        if self._url is None or host != self._url_host:
+            self._url = f"coaps://{host}:5684/{self.path_str}"
+            self._url_host = host
+        return self._url
+
+    def with_path(self, path: list[str]) -> Command[T]:
+        """Return a new command like this one for another path.
+
+        The data and its serialized payload are shared with this command.
+        """
+        command: Command[T] = Command(
+            self._method,
+            path,
+            self._data,
+            parse_json=self._parse_json,
+            observe=self._observe,
+            observe_duration=self._observe_duration,
+            process_result=self._process_result,
+            err_callback=self._err_callback,
+            decode_result=self._decode_result,
+        )
+        command._payload, command._payload_bytes = self._payload, self._payload_bytes
+        return command
+
+    @classmethod
+    def merge(cls, commands: Sequence[Command[T]]) -> Command[T]:
+        """Merge PUT commands for the same resource into a single command.
+
+        The data of the commands is merged in order with merge_payloads,
+        so later commands win. The merged command has the callbacks of the
+        first command.
+        """
+        if not commands:
+            raise ValueError("No commands to merge.")
+
+        first = commands[0]
+        merged: dict[str, Any] = {}
+        for command in commands:
+            if command.method != "put":
+                raise ValueError(f"Only put commands can be merged: {command}")
+            if command.path != first.path:
+                raise ValueError(
+                    f"Commands for different resources can't be merged: "
+                    f"{first.path} and {command.path}"
+                )
+            if not isinstance(data := command.data, dict):
+                raise TypeError(f"Invalid command data: {data}")
+            merged = merge_payloads(merged, data)
+
+        combined = first.with_path(first.path)
+        combined.data = merged
+        return combined
+
+    def as_template(self) -> CommandTemplate[T]:
+        """Return a template creating commands like this one for other paths."""
+        return CommandTemplate(self)
 
     def __repr__(self) -> str:
         """Return the representation."""
@@ -106,3 +242,53 @@ class Command(Generic[T]):
         else:
             template = "<Command {} {}: {}>"
         return template.format(self.method, self.path, self.data or "")
+
+
+class CommandTemplate(Generic[T]):
+    """Create commands that only differ in their path.
+
+    Use it to send the same command to many devices or groups. The data is
+    serialized once and shared by the commands.
+    """
+
+    __slots__ = ("_command",)
+
+    def __init__(self, command: Command[T]) -> None:
+        """Create object of class."""
+        # Serialize the payload once, the commands share it.
+        command.serialize_payload()
+        self._command = command
+
+    def bind(self, path: list[str]) -> Command[T]:
+        """Return a command for the path."""
+        return self._command.with_path(path)
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return f"<CommandTemplate {self._command.method}: {self._command.data or ''}>"
+
+
+def merge_payloads(base: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+    """Return a new payload with update merged into base.
+
+    Nested objects are merged per attribute and lists of objects, like the
+    control blocks of a device, are merged per index. Other values in
+    update replace the values in base. The arguments are not modified.
+    """
+    merged = dict(base)
+    for key, value in update.items():
+        current = merged.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[key] = merge_payloads(current, value)
+        elif (
+            isinstance(value, list)
+            and isinstance(current, list)
+            and all(isinstance(item, dict) for item in (*value, *current))
+        ):
+            merged[key] = [
+                merge_payloads(current[index], item) if index < len(current) else item
+                for index, item in enumerate(value)
+            ] + current[len(value) :]
+        else:
+            merged[key] = value
+    return merged
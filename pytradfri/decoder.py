@@ -0,0 +1,334 @@
+"""Decode responses of the gateway into models.
+
+A decoder turns the raw json of a resource into its pydantic model.
+The default decoder is compiled per model. It checks that every raw value
+has exactly the type of its field and then builds the models with
+construct, skipping validation. Responses with any other value are
+validated by pydantic, so the result is the same as validating always.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from typing import Any, Protocol, TypeVar, cast
+
+from pydantic.v1 import BaseModel, Extra
+from pydantic.v1.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+_M = TypeVar("_M", bound=BaseModel)
+
+# type alias of a changed field: model, field name, new value, dotted name
+TypeFieldChange = tuple[BaseModel, str, Any, str]
+
+_NOT_SET = object()
+
+# Field types that are returned as is by pydantic when the value has the type.
+_EXACT_TYPES = (bool, float, int, str)
+# Types of response values that are compared as is with the model values.
+_SCALAR_TYPES = frozenset((bool, float, int, str, type(None)))
+
+
+class ModelDecoderFactory(Protocol):
+    """Represent a function returning the decoder of a model."""
+
+    def __call__(self, model: type[_M]) -> Callable[[Mapping[str, Any]], _M]:
+        """Return the decoder of the model."""
+
+
+class _Mismatch(Exception):
+    """Raised when a value has to be validated."""
+
+
+def validating_decoder(model: type[_M]) -> Callable[[Mapping[str, Any]], _M]:
+    """Return a decoder validating every response with pydantic."""
+
+    def decode(raw: Mapping[str, Any]) -> _M:
+        """Validate the response."""
+        return model(**raw)
+
+    return decode
+
+
+def compiled_decoder(model: type[_M]) -> Callable[[Mapping[str, Any]], _M]:
+    """Return a decoder skipping validation of values with the expected type."""
+    if (build := _compile_model(model)) is None:
+        return validating_decoder(model)
+
+    def decode(raw: Mapping[str, Any]) -> _M:
+        """Build the model, validate it if a value doesn't match its field."""
+        try:
+            return build(raw)
+        except _Mismatch:
+            return model(**raw)
+
+    return decode
+
+
+class DecoderRegistry:
+    """Hold the decoders of the models.
+
+    Set factory to change how responses are decoded, for instance to
+    validating_decoder to always validate responses.
+    """
+
+    def __init__(self, factory: ModelDecoderFactory = compiled_decoder) -> None:
+        """Create object of class."""
+        self._factory = factory
+        self._decoders: dict[type[BaseModel], Callable[[Mapping[str, Any]], Any]] = {}
+
+    @property
+    def factory(self) -> ModelDecoderFactory:
+        """Return the factory of the decoders."""
+        return self._factory
+
+    @factory.setter
+    def factory(self, value: ModelDecoderFactory) -> None:
+        """Set the factory of the decoders."""
+        self._factory = value
+        self._decoders.clear()
+
+    def get(self, model: type[_M]) -> Callable[[Mapping[str, Any]], _M]:
+        """Return the decoder of the model."""
+        if (decoder := self._decoders.get(model)) is None:
+            decoder = self._decoders[model] = self._factory(model)
+        return cast(Callable[[Mapping[str, Any]], _M], decoder)
+
+    def decode(self, model: type[_M], raw: Mapping[str, Any]) -> _M:
+        """Decode the response into the model."""
+        return self.get(model)(raw)
+
+
+DECODERS = DecoderRegistry()
+
+
+def diff_response(
+    current: BaseModel, raw: Mapping[str, Any]
+) -> list[TypeFieldChange] | None:
+    """Return the fields of a model that differ in a response of it.
+
+    Nested models, and lists of models of the same length, are compared
+    per field, and only the values that differ are validated. Return
+    None if the response has to be validated as a whole, like when a
+    value is invalid.
+    """
+    changes: list[TypeFieldChange] = []
+    try:
+        _diff_model(current, raw, "", changes)
+    except _Mismatch:
+        return None
+    return changes
+
+
+def _diff_model(
+    current: BaseModel, raw: Any, prefix: str, changes: list[TypeFieldChange]
+) -> None:
+    """Add the fields of the model that differ in the response to changes."""
+    model = type(current)
+    if (
+        not isinstance(raw, Mapping)
+        or model.__pre_root_validators__
+        or model.__post_root_validators__
+    ):
+        raise _Mismatch
+
+    current_values = current.__dict__
+    for name, field in model.__fields__.items():
+        current_value = current_values.get(name)
+        value = raw.get(field.alias, _NOT_SET)
+        if (
+            type(value) is type(current_value)
+            and type(value) in _SCALAR_TYPES
+            and value == current_value
+        ):
+            continue
+        new_value = _diff_field(
+            model,
+            field,
+            current_value,
+            value,
+            name=f"{prefix}{name}",
+            changes=changes,
+        )
+        if new_value is not _NOT_SET and new_value != current_value:
+            changes.append((current, name, new_value, f"{prefix}{name}"))
+
+
+def _diff_field(
+    model: type[BaseModel],
+    field: ModelField,
+    current_value: Any,
+    value: Any,
+    *,
+    name: str,
+    changes: list[TypeFieldChange],
+) -> Any:
+    """Return the new value of a field, or _NOT_SET if compared per field."""
+    if value is _NOT_SET:
+        if field.required:
+            raise _Mismatch
+        if field.default is None and field.default_factory is None:
+            return None
+        return field.get_default()
+    if isinstance(current_value, BaseModel) and isinstance(value, Mapping):
+        _diff_model(current_value, value, f"{name}.", changes)
+        return _NOT_SET
+    if _same_length_models(current_value, value):
+        for index, (item, raw_item) in enumerate(zip(current_value, value)):
+            _diff_model(item, raw_item, f"{name}.{index}.", changes)
+        return _NOT_SET
+    if not _has_models(current_value) and value == current_value:
+        return _NOT_SET
+    return _validate(model, field, value)
+
+
+def _validate(model: type[BaseModel], field: ModelField, value: Any) -> Any:
+    """Return the validated value of a field."""
+    new_value, errors = field.validate(value, {}, loc=field.alias, cls=model)
+    if errors:
+        raise _Mismatch
+    return new_value
+
+
+def _same_length_models(current_value: Any, value: Any) -> bool:
+    """Return if the models of a list can be compared per item with a response."""
+    return (
+        isinstance(current_value, list)
+        and isinstance(value, list)
+        and len(value) == len(current_value)
+        and all(isinstance(item, BaseModel) for item in current_value)
+    )
+
+
+def _has_models(value: Any) -> bool:
+    """Return if the value is a model or a list of models.
+
+    Comparing a model with a response would serialize the model.
+    """
+    return isinstance(value, BaseModel) or (
+        isinstance(value, list) and any(isinstance(item, BaseModel) for item in value)
+    )
+
+
+def _compile_model(model: type[_M]) -> Callable[[Any], _M] | None:
+    """Return a function building the model from a response without validation.
+
+    The function raises _Mismatch if a value has to be validated. Return
+    None if the model has settings or validators changing values.
+    """
+    config = model.__config__
+    if (
+        config.extra != Extra.ignore
+        or config.anystr_strip_whitespace
+        or config.anystr_lower
+        or config.anystr_upper
+        or config.min_anystr_length
+        or config.max_anystr_length is not None
+        or model.__validators__
+        or model.__pre_root_validators__
+        or model.__post_root_validators__
+        or model.__private_attributes__
+    ):
+        return None
+
+    fields = [
+        (name, field.alias, field, _compile_field(model, field))
+        for name, field in model.__fields__.items()
+    ]
+    new = model.__new__
+
+    def build(raw: Any) -> _M:
+        """Build the model, like construct does."""
+        if not isinstance(raw, dict):
+            raise _Mismatch
+        values: dict[str, Any] = {}
+        fields_set: set[str] = set()
+        for name, alias, field, check in fields:
+            if alias in raw:
+                values[name] = check(raw[alias])
+                fields_set.add(name)
+            elif field.required:
+                raise _Mismatch
+            elif field.default is None and field.default_factory is None:
+                values[name] = None
+            else:
+                values[name] = field.get_default()
+        instance = new(model)
+        object.__setattr__(instance, "__dict__", values)
+        object.__setattr__(instance, "__fields_set__", fields_set)
+        return instance
+
+    return build
+
+
+def _compile_field(model: type[BaseModel], field: ModelField) -> Callable[[Any], Any]:
+    """Return a function checking the value of a field."""
+    field_type = field.type_
+    nested = (
+        _compile_model(field_type)
+        if isinstance(field_type, type) and issubclass(field_type, BaseModel)
+        else None
+    )
+
+    check: Callable[[Any], Any]
+    if field.shape == SHAPE_SINGLETON and field_type in _EXACT_TYPES:
+        check = _exact_type(field_type)
+    elif field.shape == SHAPE_SINGLETON and nested is not None:
+        check = nested
+    elif field.shape == SHAPE_LIST and nested is not None:
+        check = _list_of(nested)
+    else:
+        check = _validated(model, field)
+
+    if not field.allow_none:
+        return check
+    return _allow_none(check)
+
+
+def _exact_type(field_type: type) -> Callable[[Any], Any]:
+    """Return a function checking that a value has exactly the type."""
+
+    def check(value: Any) -> Any:
+        """Check the type of the value."""
+        # Subclasses, like bool for int, are converted by validation.
+        if type(value) is not field_type:  # pylint: disable=unidiomatic-typecheck
+            raise _Mismatch
+        return value
+
+    return check
+
+
+def _list_of(build: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Return a function building the models of a list."""
+
+    def check(value: Any) -> Any:
+        """Build the models of the list."""
+        if not isinstance(value, list):
+            raise _Mismatch
+        return [build(item) for item in value]
+
+    return check
+
+
+def _validated(model: type[BaseModel], field: ModelField) -> Callable[[Any], Any]:
+    """Return a function validating the value of a field."""
+
+    def check(value: Any) -> Any:
+        """Validate the value with the field."""
+        result, errors = field.validate(value, {}, loc=field.alias, cls=model)
+        if errors:
+            raise _Mismatch
+        return result
+
+    return check
+
+
+def _allow_none(check: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Return a function checking a value that may be None."""
+
+    def check_optional(value: Any) -> Any:
+        """Check a value that may be None."""
+        if value is None:
+            return None
+        return check(value)
+
+    return check_optional
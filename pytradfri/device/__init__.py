@@ -85,7 +85,7 @@ class Device(ApiResource):
     @property
     def device_info(self) -> DeviceInfo:
         """Return Device information."""
-        return DeviceInfo(self)
+        return self._cached("device_info", DeviceInfo)
 
     @property
     def last_seen(self) -> datetime | None:
@@ -108,9 +108,7 @@ class Device(ApiResource):
     @property
     def light_control(self) -> LightControl | None:
         """Return light_control."""
-        if self.has_light_control:
-            return LightControl(self)
-        return None
+        return self._cached("light_control", _light_control)
 
     @property
     def has_socket_control(self) -> bool:
@@ -120,9 +118,7 @@ class Device(ApiResource):
     @property
     def socket_control(self) -> SocketControl | None:
         """Return socket_control."""
-        if self.has_socket_control:
-            return SocketControl(self)
-        return None
+        return self._cached("socket_control", _socket_control)
 
     @property
     def has_blind_control(self) -> bool:
@@ -132,9 +128,7 @@ class Device(ApiResource):
     @property
     def blind_control(self) -> BlindControl | None:
         """Return blind_control."""
-        if self.has_blind_control:
-            return BlindControl(self)
-        return None
+        return self._cached("blind_control", _blind_control)
 
     @property
     def has_signal_repeater_control(self) -> bool:
@@ -144,9 +138,7 @@ class Device(ApiResource):
     @property
     def signal_repeater_control(self) -> SignalRepeaterControl | None:
         """Return signal_repeater control, if any."""
-        if self.has_signal_repeater_control:
-            return SignalRepeaterControl(self)
-        return None
+        return self._cached("signal_repeater_control", _signal_repeater_control)
 
     @property
     def has_air_purifier_control(self) -> bool:
@@ -156,15 +148,48 @@ class Device(ApiResource):
     @property
     def air_purifier_control(self) -> AirPurifierControl | None:
         """Return air_purifier control, if any."""
-        if self.has_air_purifier_control:
-            return AirPurifierControl(self)
-        return None
+        return self._cached("air_purifier_control", _air_purifier_control)
 
     def __repr__(self) -> str:
         """Return representation of class object."""
         return f"<{self.id} - {self.name} ({self.device_info.model_number})>"
 
 
+def _light_control(device: Device) -> LightControl | None:
+    """Return the light_control of the device, if any."""
+    if device.has_light_control:
+        return LightControl(device)
+    return None
+
+
+def _socket_control(device: Device) -> SocketControl | None:
+    """Return the socket_control of the device, if any."""
+    if device.has_socket_control:
+        return SocketControl(device)
+    return None
+
+
+def _blind_control(device: Device) -> BlindControl | None:
+    """Return the blind_control of the device, if any."""
+    if device.has_blind_control:
+        return BlindControl(device)
+    return None
+
+
+def _signal_repeater_control(device: Device) -> SignalRepeaterControl | None:
+    """Return the signal_repeater_control of the device, if any."""
+    if device.has_signal_repeater_control:
+        return SignalRepeaterControl(device)
+    return None
+
+
+def _air_purifier_control(device: Device) -> AirPurifierControl | None:
+    """Return the air_purifier_control of the device, if any."""
+    if device.has_air_purifier_control:
+        return AirPurifierControl(device)
+    return None
+
+
 class DeviceInfo:
     """Represent device information.
 
@@ -28,7 +28,7 @@ class AirPurifierControl(BaseController):
     @property
     def air_purifiers(self) -> list[AirPurifier]:
         """Return air purifier objects of the air purifier control."""
-        return [AirPurifier(self._device, i) for i in range(len(self.raw))]
+        return self._cached_items(AirPurifier)
 
     def turn_off(self, *, index: int = 0) -> Command[None]:
         """Turn the device off."""
@@ -3,15 +3,18 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from collections.abc import Sequence
-from typing import TYPE_CHECKING
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Any, TypeVar, cast
 
+from ..command import Command
 from ..resource import BaseResponse
 
 if TYPE_CHECKING:
     # avoid cyclic import at runtime.
     from . import Device
 
+_I = TypeVar("_I")
+
 
 class BaseController:
     """Represent a controller."""
@@ -19,6 +22,8 @@ class BaseController:
     def __init__(self, device: Device) -> None:
         """Create object of class."""
         self._device = device
+        self._items: list[Any] = []
+        self._items_generation: int | None = None
 
     @property
     @abstractmethod
@@ -27,6 +32,22 @@ class BaseController:
     ) -> Sequence[BaseResponse]:
         """Return raw data that it represents."""
 
+    def _cached_items(self, item_class: Callable[[Device, int], _I]) -> list[_I]:
+        """Return the objects of the items, built once per raw generation."""
+        if (generation := self._device.raw_generation) != self._items_generation:
+            self._items = [item_class(self._device, i) for i in range(len(self.raw))]
+            self._items_generation = generation
+        return cast(list[_I], self._items)
+
+    def combine_commands(self, commands: Sequence[Command[None]]) -> Command[None]:
+        """Combine a sequence of commands for the device into one command.
+
+        The commands may come from any of the controllers of the device.
+        """
+        if commands and commands[0].path != self._device.path:
+            raise ValueError(f"Commands are not for {self._device.name}.")
+        return Command.merge(commands)
+
     @classmethod
     def _value_validate(
         cls, value: int, rnge: list[int] | tuple[int, int], identifier: str = "Given"
@@ -26,7 +26,7 @@ class BlindControl(BaseController):
     @property
     def blinds(self) -> list[Blind]:
         """Return blind objects of the blind control."""
-        return [Blind(self._device, i) for i in range(len(self.raw))]
+        return self._cached_items(Blind)
 
     def trigger_blind(self) -> Command[None]:
         """Trigger the blind's movement."""
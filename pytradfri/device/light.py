@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
+from weakref import WeakValueDictionary
 
 from pydantic.v1 import Field
 
@@ -28,6 +29,9 @@ if TYPE_CHECKING:
     # avoid cyclic import at runtime.
     from . import Device
 
+# Manufacturer, model number and firmware version of a light.
+TypeLightModel = tuple[str, str, str | None]
+
 
 class LightResponse(BaseResponse):
     """Represent API response for a blind."""
@@ -42,6 +46,117 @@ class LightResponse(BaseResponse):
     state: int = Field(alias=ATTR_DEVICE_STATE)
 
 
+class LightCapabilityRegistry:
+    """Remember the features supported by each model of light.
+
+    The features of a model are the union of the features seen on lights
+    of the model, so a model is known from the first light seen.
+    The devices recorded are indexed by model, without keeping them alive,
+    so the lights supporting some features are only looked for among the
+    devices of the models supporting them.
+    """
+
+    def __init__(self) -> None:
+        """Create object of class."""
+        self._features: dict[TypeLightModel, int] = {}
+        self._devices: dict[TypeLightModel, WeakValueDictionary[int, Device]] = {}
+        self._device_models: dict[int, TypeLightModel] = {}
+        self._matches: dict[int, list[TypeLightModel]] = {}
+
+    @staticmethod
+    def model(device: Device) -> TypeLightModel:
+        """Return the model of the light of a device."""
+        device_info = device.device_info
+        return (
+            device_info.manufacturer,
+            device_info.model_number,
+            device_info.firmware_version,
+        )
+
+    def record(self, device: Device, features: int) -> None:
+        """Record features seen on a light of the device."""
+        model = self.model(device)
+        current = self._features.get(model)
+        if current is None or current | features != current:
+            self._features[model] = (current or 0) | features
+            self._matches.clear()
+
+        if (previous := self._device_models.get(device.id)) != model:
+            if previous is not None:
+                self._devices[previous].pop(device.id, None)
+            self._device_models[device.id] = model
+        self._devices.setdefault(model, WeakValueDictionary())[device.id] = device
+
+    def add(self, device: Device) -> None:
+        """Record the features of the lights of the device."""
+        if (light_control := device.light_control) is not None:
+            for light in light_control.lights:
+                self.record(device, light.supported_features)
+
+    def features(self, device: Device) -> int | None:
+        """Return the features of the model of the device, None if not seen."""
+        return self._features.get(self.model(device))
+
+    def models(self, features: int = 0) -> list[TypeLightModel]:
+        """Return the models seen supporting all the features."""
+        if (models := self._matches.get(features)) is None:
+            models = self._matches[features] = [
+                model
+                for model, model_features in self._features.items()
+                if model_features & features == features
+            ]
+        return list(models)
+
+    def devices(self, features: int = 0) -> list[Device]:
+        """Return the devices recorded with a light supporting all the features."""
+        return [
+            device
+            for device in self._candidates(features)
+            if any(
+                light.supported_features & features == features
+                for light in _lights(device)
+            )
+        ]
+
+    def lights(self, features: int = 0) -> list[Light]:
+        """Return the lights of the devices supporting all the features."""
+        return [
+            light
+            for device in self._candidates(features)
+            for light in _lights(device)
+            if light.supported_features & features == features
+        ]
+
+    def _candidates(self, features: int) -> list[Device]:
+        """Return the devices of the models supporting all the features."""
+        return sorted(
+            (
+                device
+                for model in self.models(features)
+                if model in self._devices
+                for device in self._devices[model].values()
+            ),
+            key=lambda device: device.id,
+        )
+
+    def clear(self) -> None:
+        """Forget all models and devices."""
+        self._features.clear()
+        self._devices.clear()
+        self._device_models.clear()
+        self._matches.clear()
+
+
+LIGHT_CAPABILITIES = LightCapabilityRegistry()
+
+
+def _lights(device: Device) -> list[Light]:
+    """Return the lights of a device."""
+    if (light_control := device.light_control) is None:
+        return []
+    return light_control.lights
+
+
 class Light:
     """Represent a light.
 
@@ -53,11 +168,18 @@ class Light:
         """Create object of class."""
         self.device = device
         self.index = index
+        self._raw: LightResponse | None = None
+        self._raw_generation: int | None = None
+        self._supported_features: int | None = None
 
     @property
     def supported_features(self) -> int:
         """Return supported features."""
-        return supported_features(self.raw)
+        raw = self.raw
+        if self._supported_features is None:
+            self._supported_features = supported_features(raw)
+            LIGHT_CAPABILITIES.record(self.device, self._supported_features)
+        return self._supported_features
 
     @property
     def supports_dimmer(self) -> bool:
@@ -136,9 +258,14 @@ class Light:
     @property
     def raw(self) -> LightResponse:
         """Return raw data that it represents."""
-        light_control_response = self.device.raw.light_control
-        assert light_control_response is not None
-        return light_control_response[self.index]
+        generation = self.device.raw_generation
+        if self._raw is None or generation != self._raw_generation:
+            light_control_response = self.device.raw.light_control
+            assert light_control_response is not None
+            self._raw = light_control_response[self.index]
+            self._raw_generation = generation
+            self._supported_features = None
+        return self._raw
 
     def __repr__(self) -> str:
         """Return representation of class object."""
@@ -3,8 +3,7 @@
 from __future__ import annotations
 
 from collections.abc import Mapping, Sequence
-from copy import deepcopy
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING
 
 from ..color import COLORS
 from ..command import Command
@@ -70,7 +69,7 @@ class LightControl(BaseController):
     @property
     def lights(self) -> list[Light]:
         """Return light objects of the light control."""
-        return [Light(self._device, i) for i in range(len(self.raw))]
+        return self._cached_items(Light)
 
     def set_state(self, state: bool, *, index: int = 0) -> Command[None]:
         """Set state of a light."""
@@ -192,21 +191,8 @@ class LightControl(BaseController):
 
     def combine_commands(self, commands: Sequence[Command[None]]) -> Command[None]:
         """Combine a sequence of light control commands."""
-        combined_data: dict[str, str | int] = {}
-
         for command in commands:
-            data = command.data
-            if data is None or ATTR_LIGHT_CONTROL not in data:
+            if (data := command.data) is None or ATTR_LIGHT_CONTROL not in data:
                 raise TypeError(f"Invalid command data: {data}")
 
-            light_control_data = cast(
-                list[Mapping[str, str | int]], data[ATTR_LIGHT_CONTROL]
-            )
-            for control_data in light_control_data:
-                combined_data.update(control_data)
-
-        new_command = deepcopy(commands[0])
-        assert new_command.data is not None  # Ensured by raising an error above.
-        new_command.data[ATTR_LIGHT_CONTROL] = [combined_data]
-
-        return new_command
+        return super().combine_commands(commands)
@@ -19,4 +19,4 @@ class SignalRepeaterControl(BaseController):
     @property
     def signal_repeaters(self) -> list[SignalRepeater]:
         """Return signal repeater objects of the signal repeater control."""
-        return [SignalRepeater(self._device, i) for i in range(len(self.raw))]
+        return self._cached_items(SignalRepeater)
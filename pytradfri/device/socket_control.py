@@ -21,7 +21,7 @@ class SocketControl(BaseController):
     @property
     def sockets(self) -> list[Socket]:
         """Return socket objects of the socket control."""
-        return [Socket(self._device, i) for i in range(len(self.raw))]
+        return self._cached_items(Socket)
 
     def set_state(self, state: bool, *, index: int = 0) -> Command[None]:
         """Set state of a socket."""
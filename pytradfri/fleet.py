@@ -0,0 +1,185 @@
+"""Columnar state of a fleet of devices."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+
+from .device import Device
+from .resource import ApiResource
+
+# Value of a column when the device doesn't have the attribute.
+MISSING = -1
+
+# Name and array type code of the columns.
+COLUMNS = {
+    "id": "q",
+    "state": "b",
+    "dimmer": "h",
+    "mireds": "h",
+    "color_xy_x": "l",
+    "color_xy_y": "l",
+    "reachable": "b",
+    "last_seen": "q",
+}
+
+TypeCondition = int | Callable[[int], bool]
+
+
+class FleetStateTable:
+    """Hold the state of many devices in one array per attribute.
+
+    Queries run over the arrays instead of walking the device models. The
+    light attributes are the ones of the first light of a device. The
+    state is also set for sockets. Attributes a device doesn't have are
+    MISSING, which filters can match and aggregates skip.
+    """
+
+    def __init__(self, devices: Iterable[Device] = ()) -> None:
+        """Create object of class."""
+        self._columns = {name: array(code) for name, code in COLUMNS.items()}
+        self._rows: dict[int, int] = {}
+        for device in devices:
+            self.update(device)
+
+    def __len__(self) -> int:
+        """Return the number of devices."""
+        return len(self._rows)
+
+    def __contains__(self, device_id: object) -> bool:
+        """Return if the table has the device."""
+        return device_id in self._rows
+
+    def column(self, name: str) -> array[int]:
+        """Return a copy of a column, in the order of ids."""
+        return array(COLUMNS[name], self._columns[name])
+
+    def row(self, device_id: int) -> dict[str, int]:
+        """Return the values of a device."""
+        row = self._rows[device_id]
+        return {name: column[row] for name, column in self._columns.items()}
+
+    def update(self, device: Device) -> None:
+        """Set the values of the device, adding it if needed."""
+        values = _device_values(device)
+        if (row := self._rows.get(device.id)) is None:
+            self._rows[device.id] = len(self._columns["id"])
+            for name, column in self._columns.items():
+                column.append(values[name])
+            return
+
+        for name, column in self._columns.items():
+            column[row] = values[name]
+
+    def observe_callback(self, resource: ApiResource) -> None:
+        """Update the table from an observed device.
+
+        Pass it as callback of Device.observe.
+        """
+        if isinstance(resource, Device):
+            self.update(resource)
+
+    def remove(self, device_id: int) -> None:
+        """Remove a device."""
+        row = self._rows.pop(device_id)
+        last = len(self._columns["id"]) - 1
+        if row != last:
+            # Move the last row into the removed one.
+            for column in self._columns.values():
+                column[row] = column[last]
+            self._rows[self._columns["id"][row]] = row
+        for column in self._columns.values():
+            column.pop()
+
+    def _matches(self, conditions: dict[str, TypeCondition]) -> Sequence[int]:
+        """Return the rows matching all conditions."""
+        if not conditions:
+            return range(len(self._columns["id"]))
+
+        columns = [self._columns[name] for name in conditions]
+        tests = [
+            condition if callable(condition) else condition.__eq__
+            for condition in conditions.values()
+        ]
+        if len(columns) == 1:
+            test = tests[0]
+            return [row for row, value in enumerate(columns[0]) if test(value)]
+
+        return [
+            row
+            for row, values in enumerate(zip(*columns))
+            if all(test(value) for test, value in zip(tests, values))
+        ]
+
+    def filter(self, **conditions: TypeCondition) -> list[int]:
+        """Return the ids of the devices matching all conditions.
+
+        A condition is the value of a column, or a function returning if
+        the value matches. For instance, the lights that are on and dimmed
+        above half: filter(state=1, dimmer=lambda dimmer: dimmer > 127).
+        """
+        ids = self._columns["id"]
+        return [ids[row] for row in self._matches(conditions)]
+
+    def count(self, **conditions: TypeCondition) -> int:
+        """Return the number of devices matching all conditions."""
+        return len(self._matches(conditions))
+
+    def values(self, name: str, **conditions: TypeCondition) -> list[int]:
+        """Return the values of a column of the matching devices, skip MISSING."""
+        column = self._columns[name]
+        if not conditions:
+            return [value for value in column if value != MISSING]
+        return [
+            value
+            for row in self._matches(conditions)
+            if (value := column[row]) != MISSING
+        ]
+
+    def sum(self, name: str, **conditions: TypeCondition) -> int:
+        """Return the sum of a column over the matching devices."""
+        return sum(self.values(name, **conditions))
+
+    def mean(self, name: str, **conditions: TypeCondition) -> float | None:
+        """Return the mean of a column over the matching devices."""
+        if not (values := self.values(name, **conditions)):
+            return None
+        return sum(values) / len(values)
+
+    def min(self, name: str, **conditions: TypeCondition) -> int | None:
+        """Return the minimum of a column over the matching devices."""
+        return min(self.values(name, **conditions), default=None)
+
+    def max(self, name: str, **conditions: TypeCondition) -> int | None:
+        """Return the maximum of a column over the matching devices."""
+        return max(self.values(name, **conditions), default=None)
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return f"<FleetStateTable {len(self)} devices>"
+
+
+def _device_values(device: Device) -> dict[str, int]:
+    """Return the column values of a device."""
+    raw = device.raw
+    values = dict.fromkeys(COLUMNS, MISSING)
+    values["id"] = raw.id
+    values["reachable"] = raw.reachable
+    if raw.last_seen is not None:
+        values["last_seen"] = raw.last_seen
+
+    if raw.light_control:
+        light = raw.light_control[0]
+        values["state"] = light.state
+        for name, value in (
+            ("dimmer", light.dimmer),
+            ("mireds", light.color_mireds),
+            ("color_xy_x", light.color_xy_x),
+            ("color_xy_y", light.color_xy_y),
+        ):
+            if value is not None:
+                values[name] = value
+    elif raw.socket_control:
+        values["state"] = raw.socket_control[0].state
+
+    return values
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Awaitable, Iterable, Sequence
 from datetime import datetime, timezone
-from typing import Any
+from time import monotonic
+from typing import Any, Protocol
 
 from pydantic.v1 import BaseModel, Field
 
-from .command import Command
+from .command import Command, CommandTemplate, T
 from .const import (
     ATTR_ALEXA_PAIR_STATUS,
     ATTR_AUTH,
@@ -63,6 +66,13 @@ class GatewayInfoResponse(BaseModel):
     update_progress: int = Field(alias=ATTR_GATEWAY_UPDATE_PROGRESS)
 
 
+class AsyncRequestProtocol(Protocol):
+    """Represent an async request method, like the aiocoap APIFactory request."""
+
+    def __call__(self, api_commands: Command[T]) -> Awaitable[T]:
+        """Define the signature of the request method."""
+
+
 class Gateway:
     """IKEA Tradfri Gateway specific methods and properties."""
 
@@ -127,7 +137,8 @@ class Gateway:
         """
 
         def process_result(result: list[int]) -> list[Command[Device]]:
-            return [self.get_device(dev) for dev in result]
+            template = CommandTemplate(Command("get", [], process_result=Device))
+            return [template.bind([ROOT_DEVICES, str(dev)]) for dev in result]
 
         return Command("get", [ROOT_DEVICES], process_result=process_result)
 
@@ -137,13 +148,7 @@ class Gateway:
 
         Returns a Command.
         """
-
-        def process_result(result: TypeRaw) -> Device:
-            return Device(result)
-
-        return Command(
-            "get", [ROOT_DEVICES, str(device_id)], process_result=process_result
-        )
+        return Command("get", [ROOT_DEVICES, str(device_id)], process_result=Device)
 
     def get_groups(self) -> Command[list[Command[Group]]]:
         """Return the groups linked to the gateway.
@@ -276,6 +281,89 @@ class Gateway:
         """
         return Command("post", [ROOT_GATEWAY, ATTR_GATEWAY_FACTORY_DEFAULTS])
 
+    async def snapshot(
+        self, request: AsyncRequestProtocol, *, max_concurrency: int = 8
+    ) -> GatewaySnapshot:
+        """Fetch the gateway info, devices, groups, moods and smart tasks.
+
+        The chains of requests run concurrently, each resource is fetched
+        as soon as its id is listed, and at most max_concurrency requests
+        are in flight. If a request fails, the other requests are
+        cancelled and the error is raised.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        timings: dict[str, float] = {}
+        timestamp = datetime.now(timezone.utc)
+        start = monotonic()
+
+        async def send(command: Command[T]) -> T:
+            """Send a command when there's a free slot."""
+            async with semaphore:
+                return await request(command)
+
+        async def timed(phase: str, coro: Awaitable[T]) -> T:
+            """Await the phase and record its duration."""
+            phase_start = monotonic()
+            result = await coro
+            timings[phase] = monotonic() - phase_start
+            return result
+
+        async def fetch_devices() -> list[Device]:
+            """Fetch the devices."""
+            commands = _sorted_by_id(await send(self.get_devices()))
+            return await _gather(send(command) for command in commands)
+
+        async def fetch_moods(group_id: int) -> list[Mood]:
+            """Fetch the moods of a group."""
+            commands = _sorted_by_id(await send(self.get_moods(group_id)))
+            return await _gather(send(command) for command in commands)
+
+        async def fetch_groups() -> tuple[list[Group], dict[int, list[Mood]]]:
+            """Fetch the groups, and the moods of the groups once listed."""
+            phase_start = monotonic()
+            commands = _sorted_by_id(await send(self.get_groups()))
+            group_ids = [_resource_id(command) for command in commands]
+            moods_task = asyncio.ensure_future(
+                timed("moods", _gather(fetch_moods(group) for group in group_ids))
+            )
+            try:
+                groups = await _gather(send(command) for command in commands)
+                timings["groups"] = monotonic() - phase_start
+                return groups, dict(zip(group_ids, await moods_task))
+            except BaseException:
+                await _cancel([moods_task])
+                raise
+
+        async def fetch_smart_tasks() -> list[SmartTask]:
+            """Fetch the smart tasks."""
+            commands = _sorted_by_id(await send(self.get_smart_tasks()))
+            return await _gather(send(command) for command in commands)
+
+        info_task = asyncio.ensure_future(
+            timed("gateway_info", send(self.get_gateway_info()))
+        )
+        devices_task = asyncio.ensure_future(timed("devices", fetch_devices()))
+        groups_task = asyncio.ensure_future(fetch_groups())
+        tasks_task = asyncio.ensure_future(timed("smart_tasks", fetch_smart_tasks()))
+        try:
+            gateway_info, devices, (groups, moods), smart_tasks = await asyncio.gather(
+                info_task, devices_task, groups_task, tasks_task
+            )
+        except BaseException:
+            await _cancel([info_task, devices_task, groups_task, tasks_task])
+            raise
+        timings["total"] = monotonic() - start
+
+        return GatewaySnapshot(
+            timestamp=timestamp,
+            gateway_info=gateway_info,
+            devices=devices,
+            groups=groups,
+            moods=moods,
+            smart_tasks=smart_tasks,
+            timings=timings,
+        )
+
 
 class GatewayInfo:
     """Gateway information."""
@@ -394,3 +482,67 @@ class GatewayInfo:
     def __repr__(self) -> str:
         """Return representation of class object."""
         return "<GatewayInfo>"
+
+
+class GatewaySnapshot:
+    """Represent the state of a gateway fetched by Gateway.snapshot.
+
+    The timings are the durations in seconds of the phases of the
+    snapshot: gateway_info, devices, groups, moods, smart_tasks and total.
+    The phases overlap, moods starts once the groups are listed.
+    """
+
+    def __init__(
+        self,
+        *,
+        timestamp: datetime,
+        gateway_info: GatewayInfo,
+        devices: list[Device],
+        groups: list[Group],
+        moods: dict[int, list[Mood]],
+        smart_tasks: list[SmartTask],
+        timings: dict[str, float],
+    ) -> None:
+        """Create object of class."""
+        self.timestamp = timestamp
+        self.gateway_info = gateway_info
+        self.devices = devices
+        self.groups = groups
+        self.moods = moods
+        self.smart_tasks = smart_tasks
+        self.timings = timings
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return (
+            f"<GatewaySnapshot {self.timestamp.isoformat()}"
+            f" {len(self.devices)} devices, {len(self.groups)} groups,"
+            f" {len(self.smart_tasks)} smart tasks>"
+        )
+
+
+def _resource_id(command: Command[Any]) -> int:
+    """Return the id of the resource a command gets."""
+    return int(command.path[-1])
+
+
+def _sorted_by_id(commands: list[Command[T]]) -> list[Command[T]]:
+    """Return the commands getting resources, sorted by resource id."""
+    return sorted(commands, key=_resource_id)
+
+
+async def _gather(aws: Iterable[Awaitable[T]]) -> list[T]:
+    """Await concurrently, cancel the others if one fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        await _cancel(tasks)
+        raise
+
+
+async def _cancel(tasks: Sequence[asyncio.Future[Any]]) -> None:
+    """Cancel the tasks and wait for them to finish."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,192 @@
+"""Registry of the devices of a gateway."""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Iterator
+
+from .device import Device
+from .group import Group
+from .resource import ApiResource
+
+# Names of the device attribute indexes.
+INDEXES = ("name", "model_number", "serial", "application_type")
+
+
+class DeviceRegistry:
+    """Hold the devices of a gateway, indexed by id and attributes.
+
+    Each index maps a value to the ids of the devices having it, so a
+    lookup is a dict access and a query on several attributes intersects
+    the sets of ids. Group membership is indexed from the groups that are
+    added. Keep it up to date with sync, for the result of get_devices,
+    and by passing observe_callback to Device.observe and Group.observe.
+    """
+
+    def __init__(
+        self, devices: Iterable[Device] = (), groups: Iterable[Group] = ()
+    ) -> None:
+        """Create object of class."""
+        self._devices: dict[int, Device] = {}
+        self._indexes: dict[str, dict[Hashable, set[int]]] = {
+            name: {} for name in INDEXES
+        }
+        self._keys: dict[int, tuple[Hashable, ...]] = {}
+        self._group_members: dict[int, set[int]] = {}
+        self._device_groups: dict[int, set[int]] = {}
+        for device in devices:
+            self.update(device)
+        for group in groups:
+            self.update_group(group)
+
+    def __len__(self) -> int:
+        """Return the number of devices."""
+        return len(self._devices)
+
+    def __contains__(self, device_id: object) -> bool:
+        """Return if the registry has the device."""
+        return device_id in self._devices
+
+    def __iter__(self) -> Iterator[Device]:
+        """Return an iterator over the devices."""
+        return iter(self._devices.values())
+
+    def get(self, device_id: int) -> Device | None:
+        """Return the device with the id."""
+        return self._devices.get(device_id)
+
+    def update(self, device: Device) -> None:
+        """Add the device, or replace the device with the same id."""
+        keys = _device_keys(device)
+        if (current := self._keys.get(device.id)) != keys:
+            if current is not None:
+                self._unindex(device.id, current)
+            for name, key in zip(INDEXES, keys):
+                self._indexes[name].setdefault(key, set()).add(device.id)
+            self._keys[device.id] = keys
+        self._devices[device.id] = device
+
+    def remove(self, device_id: int) -> None:
+        """Remove the device with the id.
+
+        The device stays member of its groups.
+        """
+        del self._devices[device_id]
+        self._unindex(device_id, self._keys.pop(device_id))
+
+    def sync(self, devices: Iterable[Device]) -> None:
+        """Set the devices to the ones of the gateway, like from get_devices."""
+        devices = list(devices)
+        current = {device.id for device in devices}
+        for device_id in [dev for dev in self._devices if dev not in current]:
+            self.remove(device_id)
+        for device in devices:
+            self.update(device)
+
+    def update_group(self, group: Group) -> None:
+        """Set the members of the group."""
+        self.remove_group(group.id)
+        members = set(group.member_ids)
+        self._group_members[group.id] = members
+        for device_id in members:
+            self._device_groups.setdefault(device_id, set()).add(group.id)
+
+    def remove_group(self, group_id: int) -> None:
+        """Remove the members of the group."""
+        for device_id in self._group_members.pop(group_id, ()):
+            groups = self._device_groups[device_id]
+            groups.discard(group_id)
+            if not groups:
+                del self._device_groups[device_id]
+
+    def observe_callback(self, resource: ApiResource) -> None:
+        """Update the registry from an observed device or group.
+
+        Pass it as callback of Device.observe or Group.observe.
+        """
+        if isinstance(resource, Device):
+            self.update(resource)
+        elif isinstance(resource, Group):
+            self.update_group(resource)
+
+    def groups_of(self, device_id: int) -> set[int]:
+        """Return the ids of the groups the device is member of."""
+        return set(self._device_groups.get(device_id, ()))
+
+    def find(
+        self,
+        *,
+        name: str | None = None,
+        model_number: str | None = None,
+        serial: str | None = None,
+        application_type: int | None = None,
+        group_id: int | None = None,
+    ) -> list[Device]:
+        """Return the devices matching all given attributes, sorted by id.
+
+        For instance, the blinds of a group:
+        find(application_type=ATTR_APPLICATION_TYPE_BLIND, group_id=group.id)
+        """
+        matches = [
+            self._indexes[index].get(value, set())
+            for index, value in zip(
+                INDEXES, (name, model_number, serial, application_type)
+            )
+            if value is not None
+        ]
+        if group_id is not None:
+            matches.append(self._group_members.get(group_id, set()))
+        if not matches:
+            return [self._devices[device_id] for device_id in sorted(self._devices)]
+
+        # Intersect starting from the smallest set.
+        matches.sort(key=len)
+        ids = matches[0].intersection(*matches[1:])
+        return [
+            self._devices[device_id]
+            for device_id in sorted(ids)
+            if device_id in self._devices
+        ]
+
+    def by_name(self, name: str) -> list[Device]:
+        """Return the devices with the name."""
+        return self.find(name=name)
+
+    def by_model(self, model_number: str) -> list[Device]:
+        """Return the devices of the model."""
+        return self.find(model_number=model_number)
+
+    def by_serial(self, serial: str) -> list[Device]:
+        """Return the devices with the serial."""
+        return self.find(serial=serial)
+
+    def by_application_type(self, application_type: int) -> list[Device]:
+        """Return the devices of the application type."""
+        return self.find(application_type=application_type)
+
+    def in_group(self, group_id: int) -> list[Device]:
+        """Return the known devices that are member of the group."""
+        return self.find(group_id=group_id)
+
+    def _unindex(self, device_id: int, keys: tuple[Hashable, ...]) -> None:
+        """Remove the device from the attribute indexes."""
+        for name, key in zip(INDEXES, keys):
+            index = self._indexes[name]
+            ids = index[key]
+            ids.discard(device_id)
+            if not ids:
+                del index[key]
+
+    def __repr__(self) -> str:
+        """Return representation of class object."""
+        return f"<DeviceRegistry {len(self)} devices>"
+
+
+def _device_keys(device: Device) -> tuple[Hashable, ...]:
+    """Return the indexed values of a device, in the order of INDEXES."""
+    raw = device.raw
+    return (
+        raw.name,
+        raw.device_info.model_number,
+        raw.device_info.serial,
+        raw.application_type,
+    )
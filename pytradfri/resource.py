@@ -3,14 +3,23 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, TypeVar, cast
 
 from pydantic.v1 import BaseModel, Field
 
 from .command import Command
-from .const import ATTR_CREATED_AT, ATTR_ID, ATTR_NAME, ATTR_OTA_UPDATE_STATE
+from .const import (
+    ATTR_CREATED_AT,
+    ATTR_ID,
+    ATTR_NAME,
+    ATTR_OTA_UPDATE_STATE,
+    ATTR_TRANSITION_TIME,
+)
+from .decoder import DECODERS, diff_response
+
+_R = TypeVar("_R")
 
 # type alias
 TypeRaw = dict[str, str | int | list[dict[str, str | int]]]
@@ -38,7 +47,46 @@ class ApiResource:
 
     def __init__(self, raw: TypeRaw) -> None:
         """Initialize base object."""
-        self.raw = self._model_class(**raw)  # type: ignore[arg-type]
+        self.raw = DECODERS.decode(self._model_class, raw)
+        self._changed_fields: tuple[str, ...] = ()
+        self._raw_generation = 0
+        self._cache_raw: ApiResourceResponse | None = None
+        self._cache: dict[str, Any] = {}
+
+    @property
+    def raw_generation(self) -> int:
+        """Return a number that changes when raw is replaced or patched.
+
+        Changes made to raw in place, other than by observe, are not seen.
+        """
+        if self.raw is not self._cache_raw:
+            self._invalidate_cache()
+        return self._raw_generation
+
+    def _invalidate_cache(self) -> None:
+        """Start a new raw generation, dropping the objects built from raw."""
+        self._raw_generation += 1
+        self._cache_raw = self.raw
+        self._cache.clear()
+
+    def _cached(self, key: str, factory: Callable[[Any], _R]) -> _R:
+        """Return the object built from the resource, once per raw generation."""
+        if self.raw is not self._cache_raw:
+            self._invalidate_cache()
+        try:
+            return cast(_R, self._cache[key])
+        except KeyError:
+            value = self._cache[key] = factory(self)
+            return value
+
+    @property
+    def changed_fields(self) -> tuple[str, ...]:
+        """Return the fields changed by the last observed update.
+
+        Fields of nested models are named with dots, like
+        light_control.0.dimmer.
+        """
+        return self._changed_fields
 
     @property
     def id(self) -> int:
@@ -67,15 +115,45 @@ class ApiResource:
         callback: Callable[[ApiResource], None] | None,
         err_callback: Callable[[Exception], None] | None,
         duration: int = 60,
+        *,
+        patch: bool = False,
+        only_on_change: bool = False,
     ) -> Command[None]:
-        """Observe resource and call callback when updated."""
+        """Observe resource and call callback when updated.
+
+        With patch, the response is compared with the raw model and only
+        the fields that changed, in the raw model and its nested models,
+        are decoded and updated in place instead of replacing it. With
+        only_on_change, the callback is not called for updates that don't
+        change any field. The changed fields are only tracked with patch
+        or only_on_change.
+        """
+
+        def decode_callback(value: TypeRaw) -> ApiResourceResponse | TypeRaw:
+            """Build the model of the updated resource."""
+            if patch:
+                # Only the changed fields are decoded, against the raw model.
+                return value
+            return DECODERS.decode(self._model_class, value)
 
-        def observe_callback(value: TypeRaw) -> None:
+        def observe_callback(value: ApiResourceResponse | TypeRaw) -> None:
             """Call when end point is updated.
 
             Returns a Command.
             """
-            self.raw = self._model_class(**value)  # type: ignore[arg-type]
+            if isinstance(value, ApiResourceResponse):
+                if only_on_change:
+                    self._changed_fields = tuple(
+                        _patch_model(self.raw, value, apply=False)
+                    )
+                self.raw = value
+            else:
+                self._changed_fields = tuple(self._patch_raw(value))
+                if self._changed_fields:
+                    self._invalidate_cache()
+
+            if only_on_change and not self._changed_fields:
+                return
 
             if callback:
                 callback(self)
@@ -87,8 +165,21 @@ class ApiResource:
             err_callback=err_callback,
             observe=True,
             observe_duration=duration,
+            decode_result=decode_callback,
         )
 
+    def _patch_raw(self, value: TypeRaw) -> list[str]:
+        """Update the fields of the raw model that differ in the response."""
+        if (changes := diff_response(self.raw, value)) is None:
+            # Validate the whole response.
+            return _patch_model(
+                self.raw, DECODERS.decode(self._model_class, value), apply=True
+            )
+
+        for model, name, field_value, _ in changes:
+            setattr(model, name, field_value)
+        return [dotted_name for _, _, _, dotted_name in changes]
+
     def set_name(self, name: str) -> Command[None]:
         """Set group name."""
         return self.set_values({ATTR_NAME: name})
@@ -101,6 +192,18 @@ class ApiResource:
         """
         return Command("put", self.path, values)
 
+    def set_desired_values(self, values: Mapping[str, Any]) -> Command[None] | None:
+        """Set the values that differ from the known state of the resource.
+
+        Values are compared with the raw state, nested objects and lists
+        of objects, like the control blocks of a device, per attribute.
+        A transition time is only sent along with values that changed.
+        Returns a Command, or None if the resource already has the values.
+        """
+        if not (changed := _diff_values(self.raw.dict(by_alias=True), values)):
+            return None
+        return self.set_values(changed)
+
     def update(self) -> Command[None]:
         """Update the group.
 
@@ -108,6 +211,78 @@ class ApiResource:
         """
 
         def process_result(result: TypeRaw) -> None:
-            self.raw = self._model_class(**result)  # type: ignore[arg-type]
+            self.raw = DECODERS.decode(self._model_class, result)
 
         return Command("get", self.path, process_result=process_result)
+
+
+def _patch_model(
+    current: BaseModel, new: BaseModel, *, apply: bool, prefix: str = ""
+) -> list[str]:
+    """Return the names of the fields of the new model that differ.
+
+    Models, and lists of models of the same length, are compared per
+    field. With apply, the fields that differ are set on current.
+    """
+    changed: list[str] = []
+    current_values = current.__dict__
+    for name, value in new.__dict__.items():
+        current_value = current_values.get(name)
+        if isinstance(value, BaseModel) and isinstance(current_value, type(value)):
+            changed += _patch_model(
+                current_value, value, apply=apply, prefix=f"{prefix}{name}."
+            )
+        elif (
+            isinstance(value, list)
+            and isinstance(current_value, list)
+            and len(value) == len(current_value)
+            and all(
+                isinstance(item, BaseModel) and isinstance(current_item, type(item))
+                for current_item, item in zip(current_value, value)
+            )
+        ):
+            for index, (current_item, item) in enumerate(zip(current_value, value)):
+                changed += _patch_model(
+                    current_item, item, apply=apply, prefix=f"{prefix}{name}.{index}."
+                )
+        elif value != current_value:
+            changed.append(f"{prefix}{name}")
+            if apply:
+                setattr(current, name, value)
+    return changed
+
+
+def _diff_values(
+    current: Mapping[str, Any], desired: Mapping[str, Any]
+) -> dict[str, Any]:
+    """Return the desired values that differ from the current values."""
+    changed: dict[str, Any] = {}
+    for key, value in desired.items():
+        if key == ATTR_TRANSITION_TIME:
+            continue
+        current_value = current.get(key)
+        if isinstance(value, Mapping) and isinstance(current_value, Mapping):
+            if nested := _diff_values(current_value, value):
+                changed[key] = nested
+        elif (
+            isinstance(value, list)
+            and isinstance(current_value, list)
+            and all(isinstance(item, Mapping) for item in (*value, *current_value))
+        ):
+            items = [
+                _diff_values(current_value[index], item)
+                if index < len(current_value)
+                else dict(item)
+                for index, item in enumerate(value)
+            ]
+            # Unchanged items after the last changed one are left out.
+            while items and not items[-1]:
+                items.pop()
+            if items:
+                changed[key] = items
+        elif value != current_value:
+            changed[key] = value
+
+    if changed and ATTR_TRANSITION_TIME in desired:
+        changed[ATTR_TRANSITION_TIME] = desired[ATTR_TRANSITION_TIME]
+    return changed
@@ -2,17 +2,21 @@
 
 import asyncio
 from collections.abc import Awaitable, Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from aiocoap import Context
 from aiocoap.credentials import CredentialsMap
-from aiocoap.error import Error
+from aiocoap.error import Error, TimeoutError as COAPTimeoutError
 import pytest
 
 from pytradfri.api.aiocoap_api import APIFactory
+from pytradfri.api.recovery import RecoveryPolicy
 from pytradfri.command import Command
-from pytradfri.error import ServerError
+from pytradfri.error import ClientError, RequestTimeout, ServerError
 
 
 class MockCode:
@@ -43,6 +47,7 @@ class MockRequest:
     def __init__(self, response: Callable[[], Awaitable[Any]]) -> None:
         """Create the request."""
         self._response = response
+        self.observation = MagicMock(cancelled=False)
 
     @property
     def response(self) -> Any:
@@ -55,6 +60,12 @@ def process_result(result: Any) -> Any:
     return result
 
 
+async def yielding_response() -> MockResponse:
+    """Return a response after yielding to the loop."""
+    await asyncio.sleep(0)
+    return MockResponse()
+
+
 @pytest.fixture(name="response")
 def response_fixture() -> AsyncMock:
     """Mock response."""
@@ -174,3 +185,618 @@ async def test_shutdown_after_reset_protocol_error(
 
     assert context.create_client_context.call_count == 2
     assert context.shutdown.call_count == 2
+
+
+async def test_request_max_in_flight(context: MagicMock, response: AsyncMock) -> None:
+    """Test that list requests respect the in-flight limit."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", max_in_flight=2)
+    in_flight = 0
+    max_seen = 0
+
+    async def slow_response() -> MockResponse:
+        """Return a response after yielding to the loop."""
+        nonlocal in_flight, max_seen
+        in_flight += 1
+        max_seen = max(max_seen, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return MockResponse()
+
+    response.side_effect = slow_response
+
+    commands: list[Command[dict[str, int]]] = [
+        Command("get", [str(index)], process_result=process_result)
+        for index in range(6)
+    ]
+    result = await factory.request(commands)
+
+    assert result == [{"one": 1}] * 6
+    assert max_seen == 2
+    assert factory.scheduler.in_flight == 0
+    stats = factory.last_batch_stats
+    assert stats is not None
+    assert stats.count == 6
+
+
+async def test_adaptive_window_timeout(context: MagicMock, response: AsyncMock) -> None:
+    """Test that a timeout shrinks the adaptive window."""
+    factory = await APIFactory.init(
+        "127.0.0.1", psk="test-psk", max_in_flight=8, adaptive_window=True
+    )
+    window = factory.adaptive_window
+    assert window is not None
+    assert factory.scheduler.limit == 4
+
+    response.side_effect = asyncio.TimeoutError()
+
+    with pytest.raises(RequestTimeout):
+        await factory.request(Command("get", [""], process_result=process_result))
+
+    assert factory.scheduler.limit == 2
+
+
+async def test_coalesce_get_requests(context: MagicMock, response: AsyncMock) -> None:
+    """Test that concurrent GETs of the same path share one request."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", coalesce_gets=True)
+    results: list[Any] = []
+    response.side_effect = yielding_response
+
+    def collect(result: Any) -> Any:
+        """Collect the result."""
+        results.append(result)
+        return result
+
+    commands: list[Command[dict[str, int]]] = [
+        Command("get", ["15001", "65536"], process_result=collect) for _ in range(3)
+    ]
+    other: Command[dict[str, int]] = Command(
+        "get", ["15001", "65537"], process_result=collect
+    )
+
+    await factory.request([*commands, other])
+
+    assert context.request.call_count == 2
+    assert len(results) == 4
+    assert all(command.result == {"one": 1} for command in commands)
+
+
+async def test_coalesce_get_error(context: MagicMock, response: AsyncMock) -> None:
+    """Test that an error of a shared GET is raised to every caller."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", coalesce_gets=True)
+
+    async def failing_response() -> MockResponse:
+        """Raise an error after yielding to the loop."""
+        await asyncio.sleep(0)
+        raise Error("Boom!")
+
+    response.side_effect = failing_response
+
+    tasks = [
+        asyncio.create_task(
+            factory.request(Command("get", ["15001"], process_result=process_result))
+        )
+        for _ in range(2)
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert context.request.call_count == 1
+    assert all(isinstance(result, ServerError) for result in results)
+
+
+async def test_coalesce_get_disabled(context: MagicMock, response: AsyncMock) -> None:
+    """Test that GETs are not coalesced by default."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    response.side_effect = yielding_response
+    command: Command[dict[str, int]] = Command(
+        "get", ["15001"], process_result=process_result
+    )
+
+    await factory.request([command, command])
+
+    assert context.request.call_count == 2
+
+
+async def test_coalesce_get_joiner_timeout(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that a caller joining a GET waits at most its own timeout."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", coalesce_gets=True)
+    release = asyncio.Event()
+
+    async def slow_response() -> MockResponse:
+        """Return a response once released."""
+        await release.wait()
+        return MockResponse()
+
+    response.side_effect = slow_response
+    first = asyncio.create_task(
+        factory.request(Command("get", ["15001"], process_result=process_result))
+    )
+    await asyncio.sleep(0)
+
+    with pytest.raises(RequestTimeout):
+        await factory.request(
+            Command("get", ["15001"], process_result=process_result), timeout=0.01
+        )
+
+    release.set()
+    assert await first == {"one": 1}
+    assert context.request.call_count == 1
+
+
+async def test_coalesce_writes(context: MagicMock, response: AsyncMock) -> None:
+    """Test that writes queued behind a write in flight are merged."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", coalesce_writes=True)
+    response.side_effect = yielding_response
+    path = ["15001", "65536"]
+
+    commands: list[Command[None]] = [
+        Command("put", path, {"3311": [{"5851": 10}]}),
+        Command("put", path, {"3311": [{"5851": 20, "5712": 5}]}),
+        Command("put", path, {"3311": [{"5851": 30}]}),
+        Command("put", path, {"3311": [{"5711": 400}]}),
+    ]
+    await factory.request(commands)
+
+    assert context.request.call_count == 2
+    payloads = [
+        json.loads(call.args[0].payload) for call in context.request.call_args_list
+    ]
+    assert payloads == [
+        {"3311": [{"5851": 10}]},
+        {"3311": [{"5851": 30, "5712": 5, "5711": 400}]},
+    ]
+    # The commands are not modified by merging.
+    assert commands[1].data == {"3311": [{"5851": 20, "5712": 5}]}
+
+
+async def test_coalesce_writes_disabled(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that writes are not merged by default."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    response.side_effect = yielding_response
+    path = ["15001", "65536"]
+
+    await factory.request(
+        [
+            Command("put", path, {"3311": [{"5851": 10}]}),
+            Command("put", path, {"3311": [{"5851": 20}]}),
+            Command("put", path, {"3311": [{"5851": 30}]}),
+        ]
+    )
+
+    assert context.request.call_count == 3
+
+
+async def test_timeout_does_not_reset_protocol(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that a single timing out resource doesn't reset the protocol."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    response.side_effect = asyncio.TimeoutError()
+
+    for _ in range(3):
+        with pytest.raises(RequestTimeout):
+            await factory.request(Command("get", ["15001", "65536"]))
+
+    assert context.shutdown.call_count == 0
+    assert factory.recovery_policy.failures == 3
+    assert factory.recovery_policy.resets == 0
+
+
+async def test_timeouts_across_resources_reset_protocol(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that timeouts of several resources reset the protocol."""
+    factory = await APIFactory.init(
+        "127.0.0.1",
+        psk="test-psk",
+        recovery_policy=RecoveryPolicy(failure_threshold=2),
+    )
+    response.side_effect = asyncio.TimeoutError()
+
+    with pytest.raises(RequestTimeout):
+        await factory.request(Command("get", ["15001", "65536"]))
+    assert context.shutdown.call_count == 0
+
+    with pytest.raises(RequestTimeout):
+        await factory.request(Command("get", ["15001", "65537"]))
+    assert context.shutdown.call_count == 1
+    assert factory.recovery_policy.escalations == 1
+    assert factory.recovery_policy.resets == 1
+
+
+async def test_unanswered_request_resets_protocol(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that exhausted retransmissions reset the protocol at once."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    response.side_effect = COAPTimeoutError()
+
+    with pytest.raises(RequestTimeout):
+        await factory.request(Command("get", ["15001", "65536"]))
+
+    assert context.shutdown.call_count == 1
+    assert factory.recovery_policy.escalations == 1
+
+
+async def test_timeout_retry(context: MagicMock, response: AsyncMock) -> None:
+    """Test that a timed out request is retried."""
+    factory = await APIFactory.init(
+        "127.0.0.1", psk="test-psk", recovery_policy=RecoveryPolicy(retries=1)
+    )
+    response.side_effect = [asyncio.TimeoutError(), MockResponse()]
+
+    result = await factory.request(
+        Command("get", ["15001"], process_result=process_result)
+    )
+
+    assert result == {"one": 1}
+    assert context.request.call_count == 2
+    assert factory.recovery_policy.retried == 1
+
+
+async def test_reobserve_after_reset(context: MagicMock, response: AsyncMock) -> None:
+    """Test that observations are started again after a protocol reset."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", reobserve_jitter=0)
+    results: list[Any] = []
+
+    command: Command[None] = Command(
+        "get",
+        ["15001", "65536"],
+        observe=True,
+        observe_duration=60,
+        process_result=results.append,
+    )
+    await factory.request(command)
+    assert context.request.call_count == 1
+    assert results == [{"one": 1}]
+
+    response.side_effect = Error("Boom!")
+    with pytest.raises(ServerError):
+        await factory.request(Command("get", ["15001"]))
+    assert context.shutdown.call_count == 1
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert context.request.call_count == 3
+    assert results == [{"one": 1}, {"one": 1}]
+
+    # Shutting down does not observe again.
+    await factory.shutdown()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert context.request.call_count == 3
+
+
+async def test_reobserve_failure_calls_err_callback(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that a failing observation calls the error callback."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk", reobserve_jitter=0)
+    errors: list[Exception] = []
+
+    await factory.request(
+        Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=60,
+            err_callback=errors.append,
+        )
+    )
+
+    response.side_effect = Error("Boom!")
+    with pytest.raises(ServerError):
+        await factory.request(Command("get", ["15001"]))
+
+    # Let observing fail once and succeed afterwards.
+    response.side_effect = [ClientError("Boom!"), MockResponse()]
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert len(errors) == 1
+    assert isinstance(errors[0], ClientError)
+
+
+async def test_observe_shared_per_path(context: MagicMock, response: AsyncMock) -> None:
+    """Test that observe commands of the same path share one observation."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    request = MockRequest(response=response)
+    context.request.return_value = request
+    first: list[Any] = []
+    second: list[Any] = []
+
+    def observe_command(results: list[Any]) -> Command[None]:
+        """Return an observe command."""
+        return Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=60,
+            process_result=results.append,
+        )
+
+    command_1 = observe_command(first)
+    command_2 = observe_command(second)
+    await factory.request([command_1, command_2])
+
+    assert context.request.call_count == 1
+    assert first == [{"one": 1}]
+    assert second == [{"one": 1}]
+
+    notify = request.observation.register_callback.call_args.args[0]
+    notify(MockResponse())
+    assert len(first) == 2
+    assert len(second) == 2
+
+    factory.unobserve(command_1)
+    assert request.observation.cancel.call_count == 0
+    notify(MockResponse())
+    assert len(first) == 2
+    assert len(second) == 3
+
+    factory.unobserve(command_2)
+    assert request.observation.cancel.call_count == 1
+
+    # Observing the path again starts a new observation.
+    await factory.request(observe_command(first))
+    assert context.request.call_count == 2
+
+
+async def test_observe_stale_registers_again(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that joining a stale observation registers it again."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    requests = [MockRequest(response=response) for _ in range(2)]
+    context.request.side_effect = requests
+    first: list[Any] = []
+    second: list[Any] = []
+
+    def observe_command(results: list[Any]) -> Command[None]:
+        """Return an observe command."""
+        return Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=60,
+            process_result=results.append,
+        )
+
+    await factory.request(observe_command(first))
+    # A notification within the duration keeps the observation alive.
+    await factory.request(observe_command(second))
+    assert context.request.call_count == 1
+
+    # pylint: disable-next=protected-access
+    observation = factory._observations["15001/65536"]
+    assert observation.last_notification is not None
+    observation.last_notification -= 61
+    await factory.request(observe_command(second))
+
+    assert context.request.call_count == 2
+    assert requests[0].observation.cancel.call_count == 1
+    assert len(first) == 2
+    assert len(second) == 3
+    assert not observation.is_stale(asyncio.get_running_loop().time())
+    # pylint: disable-next=protected-access
+    assert factory._observations_err_callbacks == [requests[1].observation.error]
+
+
+async def test_observe_cancelled_starter(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that a subscriber takes over when the starting command is cancelled."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    request = MockRequest(response=response)
+    context.request.return_value = request
+    release = asyncio.Event()
+
+    async def slow_response() -> MockResponse:
+        """Return a response once released."""
+        await release.wait()
+        return MockResponse()
+
+    response.side_effect = slow_response
+    results: list[Any] = []
+
+    def observe_command() -> Command[None]:
+        """Return an observe command."""
+        return Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=60,
+            process_result=results.append,
+        )
+
+    starter = asyncio.create_task(factory.request(observe_command()))
+    await asyncio.sleep(0)
+    subscriber = asyncio.create_task(factory.request(observe_command()))
+    await asyncio.sleep(0)
+
+    starter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await subscriber
+
+    assert starter.cancelled()
+    assert results == [{"one": 1}]
+    assert context.request.call_count == 2
+
+
+async def test_observe_error_notifies_subscribers(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that an ended observation calls the error callback of subscribers."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+    request = MockRequest(response=response)
+    context.request.return_value = request
+    errors: list[Exception] = []
+
+    commands: list[Command[None]] = [
+        Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=60,
+            err_callback=errors.append,
+        )
+        for _ in range(2)
+    ]
+    await factory.request(commands)
+
+    error_callback = request.observation.register_errback.call_args.args[0]
+    error_callback(Error("Observation ended"))
+
+    assert len(errors) == 2
+
+    await factory.request(commands[0])
+    assert context.request.call_count == 2
+
+
+async def test_renew_observations(context: MagicMock, response: AsyncMock) -> None:
+    """Test that observations are renewed before their duration runs out."""
+    factory = await APIFactory.init(
+        "127.0.0.1", psk="test-psk", renew_observations=True
+    )
+    requests = [MockRequest(response=response) for _ in range(3)]
+    context.request.side_effect = requests
+    results: list[Any] = []
+
+    await factory.request(
+        Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=10,
+            process_result=results.append,
+        )
+    )
+    timeline = factory.renewal_timeline()
+    assert len(timeline) == 1
+    path, delay = timeline[0]
+    assert path == "15001/65536"
+    assert 7 <= delay <= 9
+
+    await factory.request(
+        Command(
+            "get",
+            ["15001", "65537"],
+            observe=True,
+            observe_duration=10,
+            process_result=results.append,
+        )
+    )
+    timeline = factory.renewal_timeline()
+    assert {path for path, _ in timeline} == {"15001/65536", "15001/65537"}
+    delays = [delay for _, delay in timeline]
+    assert delays == sorted(delays)
+
+    await factory.shutdown()
+    assert factory.renewal_timeline() == []
+
+
+async def test_renewal_replaces_observation(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that a renewal starts a new observation and cancels the old one."""
+    factory = await APIFactory.init(
+        "127.0.0.1", psk="test-psk", renew_observations=True
+    )
+    requests = [MockRequest(response=response) for _ in range(2)]
+    context.request.side_effect = requests
+    results: list[Any] = []
+
+    with patch("pytradfri.api.aiocoap_api.random.uniform", return_value=0.001):
+        await factory.request(
+            Command(
+                "get",
+                ["15001", "65536"],
+                observe=True,
+                observe_duration=10,
+                process_result=results.append,
+            )
+        )
+    await asyncio.sleep(0.05)
+
+    assert context.request.call_count == 2
+    assert len(results) == 2
+    assert requests[0].observation.cancel.call_count == 1
+    assert len(factory.renewal_timeline()) == 1
+    # Only the error callback of the current observation is kept.
+    # pylint: disable-next=protected-access
+    assert factory._observations_err_callbacks == [requests[1].observation.error]
+
+    await factory.shutdown()
+
+
+async def test_no_renewal_by_default(context: MagicMock) -> None:
+    """Test that observations are not renewed by default."""
+    factory = await APIFactory.init("127.0.0.1", psk="test-psk")
+
+    await factory.request(
+        Command("get", ["15001", "65536"], observe=True, observe_duration=10)
+    )
+
+    assert factory.renewal_timeline() == []
+
+
+async def test_decode_notifications_in_executor(
+    context: MagicMock, response: AsyncMock
+) -> None:
+    """Test that notifications are decoded in the executor and kept in order."""
+    executor = ThreadPoolExecutor(max_workers=4)
+    factory = await APIFactory.init(
+        "127.0.0.1", psk="test-psk", decode_executor=executor
+    )
+    request = MockRequest(response=response)
+    context.request.return_value = request
+    threads: list[int] = []
+    results: list[Any] = []
+
+    def decode(result: Any) -> Any:
+        """Decode in a worker thread."""
+        threads.append(threading.get_ident())
+        return result
+
+    await factory.request(
+        Command(
+            "get",
+            ["15001", "65536"],
+            observe=True,
+            observe_duration=60,
+            process_result=results.append,
+            decode_result=decode,
+        )
+    )
+    notify = request.observation.register_callback.call_args.args[0]
+
+    class Notification(MockResponse):
+        """A notification with a numbered payload."""
+
+        def __init__(self, number: int) -> None:
+            """Create the notification."""
+            self._number = number
+
+        @property
+        def payload(self) -> bytes:
+            """Return payload."""
+            return json.dumps({"number": self._number}).encode()
+
+    for number in range(10):
+        notify(Notification(number))
+    assert len(results) == 1
+
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if len(results) == 11:
+            break
+
+    assert results[1:] == [{"number": number} for number in range(10)]
+    assert threading.get_ident() not in threads[1:]
+    assert factory.notification_stats.count == 10
+    executor.shutdown()
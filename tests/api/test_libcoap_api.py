@@ -1,11 +1,20 @@
 """Test API utilities."""
 
 import json
+import subprocess
+import sys
+import threading
 from typing import Any
 
 import pytest
 
-from pytradfri.api.libcoap_api import APIFactory
+from pytradfri.api.libcoap_api import (
+    APIFactory,
+    ObserveStreamFramer,
+    ObserveSupervisor,
+)
+from pytradfri.command import Command
+from pytradfri.error import ClientError, RequestTimeout
 from pytradfri.gateway import Gateway
 
 
@@ -39,3 +48,216 @@ def test_custom_timeout_passed_to_subprocess(monkeypatch: pytest.MonkeyPatch) ->
     api = APIFactory("anything", psk="abc")
     api.request(Gateway().get_devices(), timeout=1)
     assert capture["timeout"] == 1
+
+
+def test_parallel_request_keeps_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a parallel list request returns results in command order."""
+    threads = set()
+    barrier = threading.Barrier(4)
+
+    def capture_args(command: list[str], **kwargs: Any) -> str:
+        threads.add(threading.current_thread().name)
+        barrier.wait(timeout=5)
+        return json.dumps({"id": command[-1].rsplit("/", 1)[-1]})
+
+    monkeypatch.setattr("subprocess.check_output", capture_args)
+
+    api = APIFactory("anything", psk="abc", max_workers=4)
+    commands = [
+        Command("get", ["15001", str(index)], process_result=lambda result: result)
+        for index in range(8)
+    ]
+    results = api.request(commands, timeout=1)
+
+    assert results == [{"id": str(index)} for index in range(8)]
+    assert len(threads) == 4
+
+
+def test_parallel_request_raises_first_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the error of the first failing command is raised."""
+
+    def capture_args(command: list[str], **kwargs: Any) -> str:
+        device_id = command[-1].rsplit("/", 1)[-1]
+        if device_id == "2":
+            raise subprocess.TimeoutExpired(command, kwargs["timeout"])
+        if device_id == "3":
+            raise subprocess.CalledProcessError(1, command)
+        return json.dumps({})
+
+    monkeypatch.setattr("subprocess.check_output", capture_args)
+
+    api = APIFactory("anything", psk="abc", max_workers=4)
+    commands = [Command("get", ["15001", str(index)]) for index in range(6)]
+
+    with pytest.raises(RequestTimeout):
+        api.request(commands)
+
+
+def test_max_workers_must_be_positive() -> None:
+    """Test that the number of workers is validated."""
+    with pytest.raises(ValueError):
+        APIFactory("anything", psk="abc", max_workers=0)
+
+
+def test_framer_splits_chunks() -> None:
+    """Test that messages split over and packed into chunks are framed."""
+    framer = ObserveStreamFramer()
+    output = '{"9001": "Name with } and {", "3": {"0": "IKEA"}}{"9003": 65537}'
+    encoded = output.encode()
+
+    assert not framer.feed(encoded[:20])
+    assert framer.feed(encoded[20:55]) == [
+        {"9001": "Name with } and {", "3": {"0": "IKEA"}}
+    ]
+    assert framer.feed(encoded[55:]) == [{"9003": 65537}]
+    assert not framer.stopped
+
+
+def test_framer_multibyte_characters() -> None:
+    """Test that characters split over chunks are decoded."""
+    framer = ObserveStreamFramer()
+    encoded = '{"9001": "Kök"}'.encode()
+    split = encoded.index(b"\xc3") + 1
+
+    assert not framer.feed(encoded[:split])
+    assert framer.feed(encoded[split:]) == [{"9001": "Kök"}]
+
+
+def test_framer_newline_stops() -> None:
+    """Test that a newline between messages means observing stopped."""
+    framer = ObserveStreamFramer()
+
+    assert framer.feed(b'{"9003": 1}\n{"9003": 2}') == [{"9003": 1}]
+    assert framer.stopped
+    assert not framer.feed(b'{"9003": 3}')
+
+
+def test_framer_error_response() -> None:
+    """Test that an error response is raised."""
+    framer = ObserveStreamFramer()
+
+    assert not framer.feed(b"4.04 Not ")
+    with pytest.raises(ClientError):
+        framer.feed(b"Found\n")
+    assert framer.stopped
+
+
+def python_process(script: str) -> subprocess.Popen[bytes]:
+    """Return a process running a python script, standing in for coap-client."""
+    return subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE)
+
+
+def test_supervisor_dispatches_and_restarts() -> None:
+    """Test that the supervisor dispatches output and restarts stopped observers."""
+    results: list[Any] = []
+    errors: list[Exception] = []
+    starts: list[int] = []
+
+    def start_process(api_command: Command[Any]) -> subprocess.Popen[bytes]:
+        starts.append(len(starts))
+        # Print a notification split in two writes, then stop observing.
+        return python_process(
+            "import sys, time\n"
+            f'sys.stdout.write(\'{{"9003": {len(starts)}, "9001": "a }}\')\n'
+            "sys.stdout.flush()\n"
+            "time.sleep(0.05)\n"
+            "sys.stdout.write('b\"}\\n')\n"
+        )
+
+    command: Command[None] = Command(
+        "get",
+        ["15001", "65537"],
+        observe=True,
+        process_result=results.append,
+        err_callback=errors.append,
+    )
+    supervisor = ObserveSupervisor(start_process, restart_delay=0)
+    supervisor.add(command)
+    supervisor.add(command)
+    assert supervisor.observing == 1
+
+    for _ in range(100):
+        supervisor.run_once(timeout=1)
+        if len(results) == 3:
+            break
+    supervisor.close()
+
+    assert results == [{"9003": index, "9001": "a }b"} for index in (1, 2, 3)]
+    assert supervisor.restarts >= 2
+    assert not errors
+
+
+def test_supervisor_error_response() -> None:
+    """Test that an observer the gateway rejects is not restarted."""
+    errors: list[Exception] = []
+    command: Command[None] = Command(
+        "get", ["15001", "65537"], observe=True, err_callback=errors.append
+    )
+    supervisor = ObserveSupervisor(
+        lambda api_command: python_process("print('4.04 Not Found')"),
+        restart_delay=0,
+    )
+    supervisor.add(command)
+
+    for _ in range(100):
+        supervisor.run_once(timeout=1)
+        if errors:
+            break
+
+    assert isinstance(errors[0], ClientError)
+    assert supervisor.observing == 0
+    assert supervisor.restarts == 0
+    supervisor.close()
+
+
+def test_supervisor_unexpected_output() -> None:
+    """Test that unexpected output restarts only that observer."""
+    results: list[Any] = []
+    starts: list[int] = []
+
+    def start_process(api_command: Command[Any]) -> subprocess.Popen[bytes]:
+        if api_command.path[-1] == "65537":
+            return python_process("print('coap-client: warning')")
+        starts.append(len(starts))
+        if len(starts) == 1:
+            raise FileNotFoundError("coap-client")
+        return python_process("import sys; sys.stdout.write('{\"9003\": 65538}')")
+
+    warning: Command[None] = Command("get", ["15001", "65537"], observe=True)
+    command: Command[None] = Command(
+        "get", ["15001", "65538"], observe=True, process_result=results.append
+    )
+    supervisor = ObserveSupervisor(start_process, restart_delay=0)
+    supervisor.add(warning)
+    supervisor.add(command)
+
+    for _ in range(100):
+        supervisor.run_once(timeout=1)
+        if results and supervisor.restarts:
+            break
+    supervisor.close()
+
+    assert results[0] == {"9003": 65538}
+    assert len(starts) >= 2
+    assert supervisor.restarts >= 1
+
+
+def test_supervisor_stop_and_remove() -> None:
+    """Test that a running supervisor can be stopped from another thread."""
+    command: Command[None] = Command("get", ["15001", "65537"], observe=True)
+    supervisor = ObserveSupervisor(
+        lambda api_command: python_process("import time; time.sleep(30)")
+    )
+    supervisor.add(command)
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+
+    supervisor.stop()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    supervisor.remove(command)
+    assert supervisor.observing == 0
+    supervisor.close()
@@ -0,0 +1,98 @@
+"""Test recovery from failing requests."""
+
+from unittest.mock import patch
+
+import pytest
+
+from pytradfri.api.recovery import RecoveryPolicy
+
+
+def test_escalate_on_failures_across_resources() -> None:
+    """Test that only failures of several resources escalate."""
+    policy = RecoveryPolicy(failure_threshold=2, window=10)
+
+    assert policy.record_failure("15001/65536") is False
+    assert policy.record_failure("15001/65536") is False
+    assert policy.record_failure("15001/65537") is True
+
+    assert policy.failures == 3
+    assert policy.escalations == 1
+    # The window is cleared after escalating.
+    assert policy.record_failure("15001/65538") is False
+
+
+def test_failures_outside_window_are_forgotten() -> None:
+    """Test that failures older than the window are forgotten."""
+    with patch("pytradfri.api.recovery.monotonic", return_value=100):
+        policy = RecoveryPolicy(failure_threshold=2, window=10)
+        assert policy.record_failure("15001/65536") is False
+    with patch("pytradfri.api.recovery.monotonic", return_value=109):
+        policy.record_success()
+    with patch("pytradfri.api.recovery.monotonic", return_value=111):
+        assert policy.record_failure("15001/65537") is False
+    with patch("pytradfri.api.recovery.monotonic", return_value=112):
+        assert policy.record_failure("15001/65538") is True
+
+
+def test_escalate_on_consecutive_failures() -> None:
+    """Test that failures of a single resource escalate when nothing succeeds."""
+    policy = RecoveryPolicy(consecutive_threshold=3)
+
+    assert policy.record_failure("15001/65536") is False
+    assert policy.record_failure("15001/65536") is False
+    policy.record_success()
+    assert policy.record_failure("15001/65536") is False
+    assert policy.record_failure("15001/65536") is False
+    assert policy.record_failure("15001/65536") is True
+
+
+def test_escalate_without_success_in_window() -> None:
+    """Test that failures escalate when nothing succeeded within the window."""
+    with patch("pytradfri.api.recovery.monotonic", return_value=100):
+        policy = RecoveryPolicy(window=10)
+        assert policy.record_failure("15001/65536") is False
+    with patch("pytradfri.api.recovery.monotonic", return_value=111):
+        assert policy.record_failure("15001/65536") is True
+
+
+def test_idle_before_failure_does_not_escalate() -> None:
+    """Test that a failure after a long idle period doesn't escalate."""
+    with patch("pytradfri.api.recovery.monotonic", return_value=100):
+        policy = RecoveryPolicy(window=60)
+        policy.record_success()
+    with patch("pytradfri.api.recovery.monotonic", return_value=220):
+        assert policy.record_failure("15001/65536") is False
+    with patch("pytradfri.api.recovery.monotonic", return_value=230):
+        policy.record_success()
+    with patch("pytradfri.api.recovery.monotonic", return_value=400):
+        assert policy.record_failure("15001/65536") is False
+    assert policy.escalations == 0
+
+
+def test_escalate_unanswered() -> None:
+    """Test that a request the gateway didn't answer escalates at once."""
+    policy = RecoveryPolicy()
+
+    assert policy.record_failure("15001/65536", unanswered=True) is True
+    assert policy.escalations == 1
+
+
+def test_counters() -> None:
+    """Test retry and reset counters."""
+    policy = RecoveryPolicy()
+    policy.record_retry()
+    policy.record_reset()
+
+    assert policy.retried == 1
+    assert policy.resets == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"failure_threshold": 0}, {"consecutive_threshold": 0}, {"retries": -1}],
+    ids=["threshold", "consecutive", "retries"],
+)
+def test_invalid_arguments(kwargs: dict[str, int]) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError):
+        RecoveryPolicy(**kwargs)
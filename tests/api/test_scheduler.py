@@ -0,0 +1,153 @@
+"""Test request scheduling."""
+
+import asyncio
+from time import monotonic
+
+import pytest
+
+from pytradfri.api.scheduler import AdaptiveWindow, BatchStats, RequestScheduler
+
+
+async def test_limit_and_fifo_order() -> None:
+    """Test that the limit is respected and waiters are served in order."""
+    scheduler = RequestScheduler(2)
+    order: list[int] = []
+    release = asyncio.Event()
+
+    async def run(index: int) -> None:
+        async with scheduler.slot():
+            order.append(index)
+            await release.wait()
+
+    tasks = [asyncio.create_task(run(index)) for index in range(5)]
+    await asyncio.sleep(0)
+
+    assert scheduler.in_flight == 2
+    assert scheduler.queued == 3
+    assert order == [0, 1]
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2, 3, 4]
+    assert scheduler.in_flight == 0
+    assert scheduler.queued == 0
+
+
+async def test_unlimited() -> None:
+    """Test that no limit lets every request through."""
+    scheduler = RequestScheduler()
+
+    for _ in range(10):
+        await scheduler.acquire()
+
+    assert scheduler.in_flight == 10
+    assert scheduler.queued == 0
+
+
+async def test_cancelled_waiter_is_skipped() -> None:
+    """Test that a cancelled waiter does not keep a slot."""
+    scheduler = RequestScheduler(1)
+    await scheduler.acquire()
+
+    waiter = asyncio.create_task(scheduler.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    scheduler.release()
+    assert scheduler.in_flight == 0
+
+    await scheduler.acquire()
+    assert scheduler.in_flight == 1
+
+
+async def test_raise_limit_wakes_waiters() -> None:
+    """Test that raising the limit hands slots to waiters."""
+    scheduler = RequestScheduler(1)
+    await scheduler.acquire()
+
+    waiter = asyncio.create_task(scheduler.acquire())
+    await asyncio.sleep(0)
+    assert scheduler.queued == 1
+
+    scheduler.limit = 2
+    await waiter
+    assert scheduler.in_flight == 2
+
+
+def test_invalid_limit() -> None:
+    """Test that the limit has to be positive."""
+    with pytest.raises(ValueError):
+        RequestScheduler(0)
+
+
+def test_batch_stats() -> None:
+    """Test batch statistics."""
+    stats = BatchStats()
+    assert stats.mean_queue_wait == 0
+    assert stats.mean_service_time == 0
+
+    stats.record(1.0, 0.5)
+    stats.record(3.0, 1.5)
+
+    assert stats.count == 2
+    assert stats.mean_queue_wait == 2.0
+    assert stats.max_queue_wait == 3.0
+    assert stats.mean_service_time == 1.0
+    assert stats.max_service_time == 1.5
+
+
+def test_adaptive_window_grows_with_flat_latency() -> None:
+    """Test that the window grows while round trip times are flat."""
+    scheduler = RequestScheduler()
+    window = AdaptiveWindow(scheduler, initial=2, maximum=4)
+    assert scheduler.limit == 2
+
+    for _ in range(20):
+        window.on_success(0.1)
+
+    assert window.window == 4
+    assert scheduler.limit == 4
+    assert window.increases == 2
+
+
+def test_adaptive_window_holds_with_rising_latency() -> None:
+    """Test that the window holds when round trip times rise."""
+    scheduler = RequestScheduler()
+    window = AdaptiveWindow(scheduler, initial=2, maximum=8)
+    window.on_success(0.1)
+    limit = scheduler.limit
+
+    for _ in range(10):
+        window.on_success(1.0)
+
+    assert scheduler.limit == limit
+
+
+def test_adaptive_window_shrinks_once_per_window() -> None:
+    """Test that timeouts shrink the window once per round of requests."""
+    scheduler = RequestScheduler()
+    window = AdaptiveWindow(scheduler, initial=8, maximum=8)
+    started_at = monotonic()
+
+    window.on_timeout(started_at)
+    window.on_timeout(started_at)
+
+    assert window.window == 4
+    assert scheduler.limit == 4
+    assert window.decreases == 1
+
+    window.on_timeout(monotonic())
+    window.on_timeout(monotonic())
+    window.on_timeout(monotonic())
+
+    assert window.window == 1
+    assert scheduler.limit == 1
+
+
+def test_adaptive_window_invalid_bounds() -> None:
+    """Test that the window bounds are validated."""
+    with pytest.raises(ValueError):
+        AdaptiveWindow(RequestScheduler(), initial=8, maximum=4)
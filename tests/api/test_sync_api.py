@@ -0,0 +1,211 @@
+"""Test the synchronous API using persistent sessions."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Generator
+import threading
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from pytradfri.api.sync_api import APIFactory
+from pytradfri.command import Command
+from pytradfri.error import RequestTimeout
+
+
+class FakeAsyncAPIFactory:
+    """Fake the aiocoap APIFactory."""
+
+    instances: list[FakeAsyncAPIFactory] = []
+    wait_for_concurrent = 0
+    active = 0
+    peak = 0
+
+    def __init__(
+        self, host: str, psk_id: str, psk: str | None, options: dict[str, Any]
+    ) -> None:
+        """Create the fake."""
+        self.host = host
+        self.psk_id = psk_id
+        self.psk = psk
+        self.options = options
+        self.requests: list[tuple[Command[Any], float | None]] = []
+        self.shut_down = False
+
+    @classmethod
+    async def init(
+        cls,
+        host: str,
+        psk_id: str = "pytradfri",
+        psk: str | None = None,
+        **options: Any,
+    ) -> FakeAsyncAPIFactory:
+        """Initialize the fake."""
+        instance = cls(host, psk_id, psk, options)
+        cls.instances.append(instance)
+        return instance
+
+    async def request(
+        self, api_commands: Command[Any] | list[Command[Any]], timeout: float | None
+    ) -> Any:
+        """Process the commands."""
+        if isinstance(api_commands, list):
+            return await asyncio.gather(
+                *(self.request(api_command, timeout) for api_command in api_commands)
+            )
+
+        await asyncio.sleep(0)
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        try:
+            for _ in range(5000):
+                if cls.peak >= cls.wait_for_concurrent:
+                    break
+                await asyncio.sleep(0.001)
+        finally:
+            cls.active -= 1
+        self.requests.append((api_commands, timeout))
+        if api_commands.method == "timeout":
+            raise RequestTimeout()
+        return api_commands.process_result(threading.current_thread().name)
+
+    async def generate_psk(self, security_key: str) -> str:
+        """Generate a psk."""
+        return f"psk-{security_key}"
+
+    async def shutdown(self) -> None:
+        """Shut down the fake."""
+        self.shut_down = True
+
+
+@pytest.fixture(name="fake_factory", autouse=True)
+def fake_factory_fixture() -> Generator[type[FakeAsyncAPIFactory]]:
+    """Patch the aiocoap APIFactory."""
+    FakeAsyncAPIFactory.instances = []
+    FakeAsyncAPIFactory.wait_for_concurrent = 0
+    FakeAsyncAPIFactory.peak = 0
+    with patch("pytradfri.api.sync_api.AsyncAPIFactory", FakeAsyncAPIFactory):
+        yield FakeAsyncAPIFactory
+
+
+def process_result(result: Any) -> Any:
+    """Process result."""
+    return result
+
+
+def test_request_single_and_list(fake_factory: type[FakeAsyncAPIFactory]) -> None:
+    """Test requests run on the background thread and return results."""
+    with APIFactory("127.0.0.1", psk="abc", timeout=20, max_in_flight=4) as api_factory:
+        command: Command[str] = Command("get", ["15001"], process_result=process_result)
+
+        result = api_factory.request(command)
+        results = api_factory.request([command, command], timeout=5)
+
+    assert result == "pytradfri-127.0.0.1"
+    assert results == [result, result]
+    (session,) = fake_factory.instances
+    assert [timeout for _, timeout in session.requests] == [20, 5, 5]
+    assert session.psk == "abc"
+    assert session.options == {"max_in_flight": 4}
+    assert session.shut_down
+
+
+def test_list_request_is_concurrent(
+    fake_factory: type[FakeAsyncAPIFactory],
+) -> None:
+    """Test that the commands of a list request are sent concurrently."""
+    # Each command waits until all of them are in flight.
+    fake_factory.wait_for_concurrent = 3
+    with APIFactory("127.0.0.1", psk="abc") as api_factory:
+        results = api_factory.request(
+            [
+                Command("get", ["15001", str(index)], process_result=process_result)
+                for index in range(3)
+            ]
+        )
+
+    assert len(results) == 3
+    assert fake_factory.peak == 3
+
+
+def test_errors_are_raised(fake_factory: type[FakeAsyncAPIFactory]) -> None:
+    """Test that errors of the request are raised to the caller."""
+    with (
+        APIFactory("127.0.0.1", psk="abc") as api_factory,
+        pytest.raises(RequestTimeout),
+    ):
+        api_factory.request(Command("timeout", ["15001"]))
+
+
+def test_pool_uses_least_busy_session(
+    fake_factory: type[FakeAsyncAPIFactory],
+) -> None:
+    """Test that concurrent callers are spread over the sessions."""
+    # Each request waits until the other one is in flight.
+    fake_factory.wait_for_concurrent = 2
+    with APIFactory("127.0.0.1", psk="abc", pool_size=2) as api_factory:
+
+        def make_requests() -> None:
+            api_factory.request(Command("get", ["15001"]))
+
+        threads = [threading.Thread(target=make_requests) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(fake_factory.instances) == 2
+    assert [len(session.requests) for session in fake_factory.instances] == [1, 1]
+
+
+def test_psk_required() -> None:
+    """Test that a psk is required to make requests."""
+    with APIFactory("127.0.0.1") as api_factory, pytest.raises(RuntimeError):
+        api_factory.request(Command("get", ["15001"]))
+
+
+def test_generate_psk(fake_factory: type[FakeAsyncAPIFactory]) -> None:
+    """Test generating a psk."""
+    with APIFactory("127.0.0.1", psk_id="identity") as api_factory:
+        assert api_factory.generate_psk("code") == "psk-code"
+        assert api_factory.psk == "psk-code"
+
+    (generator,) = fake_factory.instances
+    assert generator.psk is None
+    assert generator.shut_down
+
+
+def test_set_psk_closes_sessions(fake_factory: type[FakeAsyncAPIFactory]) -> None:
+    """Test that setting the psk sets up new sessions."""
+    with APIFactory("127.0.0.1", psk="abc") as api_factory:
+        api_factory.request(Command("get", ["15001"]))
+        api_factory.psk = "def"
+        api_factory.request(Command("get", ["15001"]))
+
+    first, second = fake_factory.instances
+    assert first.shut_down
+    assert second.psk == "def"
+
+
+def test_closed_factory() -> None:
+    """Test that a closed factory can't be used."""
+    api_factory = APIFactory("127.0.0.1", psk="abc")
+    api_factory.close()
+    api_factory.close()
+
+    with pytest.raises(RuntimeError):
+        api_factory.request(Command("get", ["15001"]))
+
+
+def test_request_from_callback_raises() -> None:
+    """Test that a request from the background thread raises."""
+    with APIFactory("127.0.0.1", psk="abc") as api_factory:
+
+        def callback(result: Any) -> Any:
+            return api_factory.request(Command("get", ["15001"]))
+
+        with pytest.raises(RuntimeError, match="own thread"):
+            api_factory.request(Command("get", ["15001"], process_result=callback))
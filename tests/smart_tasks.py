@@ -0,0 +1,64 @@
+"""Smart task definitions."""
+
+TASK = {
+    "5850": 1,
+    "9001": "Sample Name",
+    "9002": 1492349682,
+    "9003": 317094,
+    "9040": 4,
+    "9041": 48,
+    "9042": {
+        "15013": [
+            {"5712": 18000, "5851": 254, "9003": 65537},
+            {"5712": 18000, "5851": 254, "9003": 65538},
+            {"5712": 19000, "5851": 230, "9003": 65539},
+        ],
+        "5850": 1,
+    },
+    "9044": [{"9046": 8, "9047": 15}],
+}
+
+TASK2 = {
+    "5850": 1,
+    "9002": 1492349682,
+    "9003": 317094,
+    "9040": 2,
+    "9041": 48,
+    "9042": {
+        "15013": [
+            {"5712": 18000, "5851": 254, "9003": 65537},
+            {"5712": 18000, "5851": 254, "9003": 65538},
+        ],
+        "5850": 1,
+    },
+    "9044": [{"9046": 8, "9047": 15}],
+}
+
+
+TASK3 = {
+    "5850": 1,
+    "9002": 1492349682,
+    "9003": 317094,
+    "9040": 1,
+    "9041": 48,
+    "9042": {
+        "15013": [
+            {"5712": 18000, "5851": 254, "9003": 65537},
+            {"5712": 18000, "5851": 254, "9003": 65538},
+        ],
+        "5850": 1,
+    },
+    "9044": [{"9046": 8, "9047": 15}],
+}
+
+TASK_OPTIONAL_DIMMER = {
+    "9001": "Light and dark",
+    "9002": 1613335145,
+    "9003": 318615,
+    "5850": 1,
+    "9040": 2,
+    "9041": 127,
+    "9042": {"5850": 1, "15013": [{"9003": 65553}]},
+    "9043": {"5850": 0, "15013": [{"9003": 65553}]},
+    "9044": [{"9046": 15, "9047": 0, "9048": 7, "9049": 0, "9226": 0}],
+}
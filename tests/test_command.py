@@ -1,5 +1,7 @@
 """Test Command."""
 
+import pytest
+
 from pytradfri.command import Command
 
 
@@ -51,3 +53,124 @@ def test_url() -> None:
     command2: Command[None] = Command("method", ["path1", "path2"], {})
     url = command2.url("host")
     assert url == "coaps://host:5684/path1/path2"
+
+
+def test_decode_result() -> None:
+    """Test that the result is decoded before it is processed."""
+    processed: list[str] = []
+
+    def process_result(value: str) -> str:
+        processed.append(value)
+        return value
+
+    command: Command[str] = Command(
+        "method", ["path"], decode_result=str, process_result=process_result
+    )
+
+    assert command.decode_result(1) == "1"
+    assert not processed
+
+    command.process_result(2)
+    assert processed == ["2"]
+    assert command.result == "2"
+    assert command.raw_result == 2
+
+    command.apply_result(3, "decoded")
+    assert command.result == "decoded"
+    assert command.raw_result == 3
+
+
+def test_payload_cache() -> None:
+    """Test that the payload is serialized once and updated with the data."""
+    command: Command[None] = Command("put", ["path"], {"5850": 1})
+
+    payload = command.payload
+    assert payload == '{"5850": 1}'
+    assert command.payload_bytes == b'{"5850": 1}'
+    assert command.payload is payload
+
+    command.data = {"5850": 0}
+    assert command.payload == '{"5850": 0}'
+    assert command.payload_bytes == b'{"5850": 0}'
+
+    command.data = None
+    assert command.payload is None
+    assert command.payload_bytes is None
+
+
+def test_url_cache() -> None:
+    """Test that the path and url are cached and updated with the path."""
+    command: Command[None] = Command("get", ["15001", 65536])  # type: ignore[list-item]
+
+    assert command.url("host") is command.url("host")
+    assert command.url("other") == "coaps://other:5684/15001/65536"
+
+    command.path = ["15004", "131073"]
+    assert command.path_str == "15004/131073"
+    assert command.url("other") == "coaps://other:5684/15004/131073"
+
+
+def test_slots() -> None:
+    """Test that commands don't have an instance dict."""
+    command: Command[None] = Command("get", ["path"])
+
+    assert not hasattr(command, "__dict__")
+
+
+def test_template() -> None:
+    """Test that a template creates commands sharing the payload."""
+
+    def process_result(value: int) -> int:
+        return value + 1
+
+    template = Command(
+        "put", ["15001"], {"3311": [{"5851": 128}]}, process_result=process_result
+    ).as_template()
+    first = template.bind(["15001", "65537"])
+    second = template.bind(["15001", "65538"])
+
+    assert first.path_str == "15001/65537"
+    assert second.url("host") == "coaps://host:5684/15001/65538"
+    assert first.payload_bytes is second.payload_bytes
+    assert first.payload == '{"3311": [{"5851": 128}]}'
+    assert second.process_result(1) == 2
+    assert first.result is None
+    assert repr(template) == "<CommandTemplate put: {'3311': [{'5851': 128}]}>"
+
+
+def test_merge() -> None:
+    """Test merging commands for the same resource."""
+    light: Command[None] = Command("put", ["15001", "65537"], {"3311": [{"5850": 1}]})
+    dimmer: Command[None] = Command(
+        "put", ["15001", "65537"], {"3311": [{"5851": 50, "5850": 0}]}
+    )
+    name: Command[None] = Command("put", ["15001", "65537"], {"9001": "Lamp"})
+
+    merged = Command.merge([light, dimmer, name])
+
+    assert merged.method == "put"
+    assert merged.path == ["15001", "65537"]
+    assert merged.data == {"3311": [{"5850": 0, "5851": 50}], "9001": "Lamp"}
+    assert merged.payload == '{"3311": [{"5850": 0, "5851": 50}], "9001": "Lamp"}'
+    assert light.data == {"3311": [{"5850": 1}]}
+
+
+@pytest.mark.parametrize(
+    ("commands", "error"),
+    [
+        ([], ValueError),
+        ([Command("get", ["15001", "65537"])], ValueError),
+        (
+            [
+                Command("put", ["15001", "65537"], {"9001": "a"}),
+                Command("put", ["15001", "65538"], {"9001": "b"}),
+            ],
+            ValueError,
+        ),
+        ([Command("put", ["15001", "65537"], "data")], TypeError),
+    ],
+)
+def test_merge_invalid(commands: list[Command[None]], error: type[Exception]) -> None:
+    """Test that incompatible commands are not merged."""
+    with pytest.raises(error):
+        Command.merge(commands)
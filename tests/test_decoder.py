@@ -0,0 +1,121 @@
+"""Test decoding responses into models."""
+
+from collections.abc import Callable, Mapping
+from copy import deepcopy
+from typing import Any, TypeVar
+
+from pydantic.v1 import BaseModel, ValidationError
+import pytest
+
+from pytradfri.const import (
+    ATTR_DEVICE_STATE,
+    ATTR_ID,
+    ATTR_LIGHT_CONTROL,
+    ATTR_LIGHT_DIMMER,
+    ATTR_NAME,
+)
+from pytradfri.decoder import (
+    DecoderRegistry,
+    compiled_decoder,
+    diff_response,
+    validating_decoder,
+)
+from pytradfri.device import DeviceResponse
+from pytradfri.group import GroupResponse
+
+from .devices import (
+    AIR_PURIFIER,
+    DEVICE_WITHOUT_FIRMWARE_VERSION,
+    GROUP,
+    LIGHT_CWS,
+    OUTLET,
+    SIGNAL_REPEATER,
+)
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@pytest.mark.parametrize(
+    ("model", "raw"),
+    [
+        (DeviceResponse, AIR_PURIFIER),
+        (DeviceResponse, SIGNAL_REPEATER),
+        (DeviceResponse, DEVICE_WITHOUT_FIRMWARE_VERSION),
+        (DeviceResponse, LIGHT_CWS),
+        (DeviceResponse, OUTLET),
+        (GroupResponse, GROUP),
+    ],
+)
+def test_compiled_decoder_matches_validation(
+    model: type[BaseModel], raw: dict[str, Any]
+) -> None:
+    """Test that the compiled decoder builds the same model as validation."""
+    decoded = compiled_decoder(model)(raw)
+    validated = validating_decoder(model)(raw)
+
+    assert decoded == validated
+    assert decoded.__fields_set__ == validated.__fields_set__
+
+
+def test_compiled_decoder_validates_mismatch() -> None:
+    """Test that values that don't have the type of their field are validated."""
+    raw = deepcopy(LIGHT_CWS)
+    raw[ATTR_LIGHT_CONTROL][0][ATTR_DEVICE_STATE] = True  # type: ignore[index]
+
+    decoded = compiled_decoder(DeviceResponse)(raw)
+
+    assert decoded.light_control is not None
+    assert decoded.light_control[0].state == 1
+    # The bool must be converted, isinstance would accept it as an int.
+    assert type(decoded.light_control[0].state) is int  # pylint: disable=unidiomatic-typecheck
+
+
+def test_compiled_decoder_invalid() -> None:
+    """Test that invalid responses raise a validation error."""
+    raw = deepcopy(LIGHT_CWS)
+    raw[ATTR_NAME] = {"invalid": "name"}
+
+    with pytest.raises(ValidationError):
+        compiled_decoder(DeviceResponse)(raw)
+
+
+def test_registry_factory() -> None:
+    """Test that the factory of the registry can be changed."""
+    models: list[type[BaseModel]] = []
+
+    def factory(model: type[M]) -> Callable[[Mapping[str, Any]], M]:
+        models.append(model)
+        return validating_decoder(model)
+
+    registry = DecoderRegistry()
+    decoder = registry.get(GroupResponse)
+    assert registry.get(GroupResponse) is decoder
+
+    registry.factory = factory
+    assert registry.factory is factory
+    assert registry.decode(GroupResponse, GROUP) == decoder(GROUP)
+    registry.decode(GroupResponse, GROUP)
+    assert models == [GroupResponse]
+
+
+def test_diff_response() -> None:
+    """Test that only the changed fields of a response are decoded."""
+    current = validating_decoder(DeviceResponse)(LIGHT_CWS)
+    assert current.light_control is not None
+    light = current.light_control[0]
+
+    assert diff_response(current, deepcopy(LIGHT_CWS)) == []
+
+    raw = deepcopy(LIGHT_CWS)
+    raw[ATTR_NAME] = "Changed"
+    raw[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = "10"  # type: ignore[index]
+    # Equal after validation.
+    raw[ATTR_LIGHT_CONTROL][0][ATTR_DEVICE_STATE] = False  # type: ignore[index]
+
+    assert diff_response(current, raw) == [
+        (current, "name", "Changed", "name"),
+        (light, "dimmer", 10, "light_control.0.dimmer"),
+    ]
+
+    raw[ATTR_ID] = "not an id"
+    assert diff_response(current, raw) is None
@@ -4,12 +4,14 @@ from copy import deepcopy
 from datetime import datetime, timezone
 from typing import Any
 
+from pydantic.v1 import ValidationError
 import pytest
 
 from pytradfri import error
 from pytradfri.const import (
     ATTR_DEVICE_INFO,
     ATTR_DEVICE_STATE,
+    ATTR_ID,
     ATTR_LAST_SEEN,
     ATTR_LIGHT_COLOR_HEX,
     ATTR_LIGHT_COLOR_HUE,
@@ -343,6 +345,59 @@ def test_socket_value_setting(
     assert data == expected_result
 
 
+def test_socket_combine_commands() -> None:
+    """Test combining socket commands."""
+    device = Device(deepcopy(OUTLET))
+    socket_control = device.socket_control
+    assert socket_control is not None
+
+    command = socket_control.combine_commands(
+        [socket_control.set_state(True), device.set_name("Outlet")]
+    )
+
+    assert command.data == {
+        ATTR_SWITCH_PLUG: [{ATTR_DEVICE_STATE: 1}],
+        ATTR_NAME: "Outlet",
+    }
+
+    with pytest.raises(ValueError):
+        socket_control.combine_commands([Device(LIGHT_W).set_name("Light")])
+
+
+def test_set_desired_values() -> None:
+    """Test that only changed values are set on a device."""
+    device = Device(LIGHT_WS)
+
+    assert (
+        device.set_desired_values(
+            {
+                ATTR_NAME: device.name,
+                ATTR_LIGHT_CONTROL: [{ATTR_DEVICE_STATE: True, ATTR_LIGHT_DIMMER: 254}],
+                ATTR_TRANSITION_TIME: 10,
+            }
+        )
+        is None
+    )
+
+    command = device.set_desired_values(
+        {
+            ATTR_LIGHT_CONTROL: [
+                {
+                    ATTR_DEVICE_STATE: 1,
+                    ATTR_LIGHT_DIMMER: 100,
+                    ATTR_TRANSITION_TIME: 10,
+                }
+            ]
+        }
+    )
+
+    assert command is not None
+    assert command.path == device.path
+    assert command.data == {
+        ATTR_LIGHT_CONTROL: [{ATTR_LIGHT_DIMMER: 100, ATTR_TRANSITION_TIME: 10}]
+    }
+
+
 def test_socket_state_off() -> None:
     """Test socket off."""
     socket_response = deepcopy(OUTLET)
@@ -570,3 +625,132 @@ def test_device_info_battery_level_unknown(
     info = Device(response).device_info
 
     assert info.battery_level is None
+
+
+def test_observe_decodes_model(device: Device) -> None:
+    """Test that the observe command decodes the model before updating."""
+    updated: list[Device] = []
+    command = device.observe(updated.append, None)
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_NAME] = "Decoded"
+
+    decoded = command.decode_result(response)
+    assert device.name != "Decoded"
+    assert not updated
+
+    command.apply_result(response, decoded)
+    assert device.name == "Decoded"
+    assert updated == [device]
+
+
+def test_observe_patch(device: Device) -> None:
+    """Test that observed updates patch the changed fields in place."""
+    updated: list[tuple[str, ...]] = []
+    command = device.observe(
+        lambda device: updated.append(device.changed_fields),
+        None,
+        patch=True,
+        only_on_change=True,
+    )
+    raw = device.raw
+    assert device.light_control is not None
+    light_raw = device.light_control.raw[0]
+
+    command.process_result(deepcopy(LIGHT_WS))
+    assert not updated
+    assert device.changed_fields == ()
+
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = 100  # type: ignore[index]
+    response[ATTR_NAME] = "Patched"
+    command.process_result(response)
+
+    assert updated == [("name", "light_control.0.dimmer")]
+    assert device.raw is raw
+    assert device.light_control.raw[0] is light_raw
+    assert device.light_control.lights[0].dimmer == 100
+    assert device.name == "Patched"
+    assert device.raw == Device(response).raw
+
+
+def test_observe_changed_fields(device: Device) -> None:
+    """Test that changed fields are reported when replacing the model."""
+    updated: list[tuple[str, ...]] = []
+    command = device.observe(
+        lambda device: updated.append(device.changed_fields),
+        None,
+        only_on_change=True,
+    )
+    raw = device.raw
+
+    command.process_result(deepcopy(LIGHT_WS))
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_LIGHT_CONTROL][0][ATTR_DEVICE_STATE] = 0  # type: ignore[index]
+    command.process_result(response)
+
+    assert updated == [("light_control.0.state",)]
+    assert device.raw is not raw
+
+
+def test_observe_untracked_changes(device: Device) -> None:
+    """Test that changes are not tracked by default."""
+    updated: list[tuple[str, ...]] = []
+    command = device.observe(lambda device: updated.append(device.changed_fields), None)
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_LIGHT_CONTROL][0][ATTR_DEVICE_STATE] = 0  # type: ignore[index]
+
+    command.process_result(response)
+
+    assert updated == [()]
+    assert device.light_control is not None
+    assert device.light_control.lights[0].state is False
+
+
+def test_observe_patch_validates_response(device: Device) -> None:
+    """Test patching fields that can't be compared per field."""
+    command = device.observe(None, None, patch=True)
+    raw = device.raw
+
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_LIGHT_CONTROL].append(  # type: ignore[union-attr]
+        deepcopy(response[ATTR_LIGHT_CONTROL][0])  # type: ignore[index]
+    )
+    response[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = "50"  # type: ignore[index]
+    command.process_result(response)
+
+    assert device.changed_fields == ("light_control",)
+    assert device.raw is raw
+    assert device.raw == Device(response).raw
+
+    response[ATTR_ID] = "not an id"
+    with pytest.raises(ValidationError):
+        command.process_result(response)
+
+
+def test_cached_accessors(device: Device) -> None:
+    """Test that accessors are cached until raw changes."""
+    light_control = device.light_control
+    assert light_control is not None
+    light = light_control.lights[0]
+
+    assert device.light_control is light_control
+    device_info = device.device_info
+    assert device.device_info is device_info
+    assert light_control.lights[0] is light
+    assert device.socket_control is None
+
+    command = device.observe(None, None, patch=True)
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = 100  # type: ignore[index]
+    command.process_result(response)
+
+    assert device.light_control is not light_control
+    assert light.dimmer == 100
+
+    light_control = device.light_control
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = 50  # type: ignore[index]
+    device.update().process_result(response)
+
+    assert device.light_control is not light_control
+    assert light.dimmer == 50
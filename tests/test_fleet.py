@@ -0,0 +1,66 @@
+"""Test the fleet state table."""
+
+from copy import deepcopy
+
+from pytradfri.const import ATTR_ID, ATTR_LIGHT_CONTROL, ATTR_LIGHT_DIMMER
+from pytradfri.device import Device
+from pytradfri.fleet import MISSING, FleetStateTable
+from pytradfri.resource import TypeRaw
+
+from .devices import LIGHT_CWS, LIGHT_W, LIGHT_WS, MOTION_SENSOR, OUTLET
+
+
+def device(raw: TypeRaw, device_id: int, dimmer: int | None = None) -> Device:
+    """Return a device with another id and dimmer."""
+    raw = deepcopy(raw)
+    raw[ATTR_ID] = device_id
+    if dimmer is not None:
+        raw[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = dimmer  # type: ignore[index]
+    return Device(raw)
+
+
+def test_filter_and_aggregate() -> None:
+    """Test filters and aggregates over the table."""
+    table = FleetStateTable(
+        [
+            device(LIGHT_W, 1, dimmer=200),
+            device(LIGHT_WS, 2, dimmer=50),
+            device(LIGHT_CWS, 3, dimmer=130),
+            device(OUTLET, 4),
+            device(MOTION_SENSOR, 5),
+        ]
+    )
+
+    assert len(table) == 5
+    assert 3 in table
+    assert table.filter(state=1, dimmer=lambda dimmer: dimmer > 127) == [1]
+    assert table.count(dimmer=MISSING) == 2
+    assert table.count() == 5
+    assert table.mean("dimmer") == (200 + 50 + 130) / 3
+    assert table.sum("dimmer", state=1) == 250
+    assert table.min("dimmer") == 50
+    assert table.max("mireds", id=lambda device_id: device_id > 10) is None
+    assert table.row(4)["state"] == OUTLET["3312"][0]["5850"]  # type: ignore[index]
+    assert list(table.column("id")) == [1, 2, 3, 4, 5]
+
+
+def test_update_and_remove() -> None:
+    """Test updating and removing devices."""
+    light = device(LIGHT_WS, 1, dimmer=50)
+    table = FleetStateTable([light, device(LIGHT_W, 2), device(OUTLET, 3)])
+
+    command = light.observe(table.observe_callback, None)
+    response = deepcopy(LIGHT_WS)
+    response[ATTR_ID] = 1
+    response[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_DIMMER] = 100  # type: ignore[index]
+    command.process_result(response)
+
+    assert table.row(1)["dimmer"] == 100
+
+    table.remove(1)
+
+    assert 1 not in table
+    assert list(table.column("id")) == [3, 2]
+    assert table.row(3)["dimmer"] == MISSING
+    assert table.row(2)["dimmer"] == LIGHT_W["3311"][0]["5851"]  # type: ignore[index]
+    assert repr(table) == "<FleetStateTable 2 devices>"
@@ -1,13 +1,21 @@
 """Test Gateway."""
 
+import asyncio
 from copy import deepcopy
 from datetime import datetime, timezone
+from typing import Any
 
 import pytest
 
+from pytradfri.command import Command, T
 from pytradfri.const import ATTR_CLIENT_IDENTITY_PROPOSED, ATTR_PSK, ROOT_DEVICES
+from pytradfri.error import ClientError
 from pytradfri.gateway import Gateway, GatewayInfo
 
+from .devices import GROUP, LIGHT_W, LIGHT_WS
+from .moods import MOOD
+from .smart_tasks import TASK
+
 GATEWAY_INFO = {
     "9023": "xyz.pool.ntp.pool",
     "9059": 1509788799,
@@ -86,3 +94,79 @@ def test_generate_psk(gateway: Gateway) -> None:
     assert command.method == "post"
     assert command.data == {ATTR_CLIENT_IDENTITY_PROPOSED: "identityString"}
     assert "PSKstring" in command.process_result({ATTR_PSK: "PSKstring"})
+
+
+class FakeRequest:
+    """Answer requests from responses by path, counting requests in flight."""
+
+    def __init__(self, responses: dict[str, Any]) -> None:
+        """Create object of class."""
+        self.responses = responses
+        self.in_flight = 0
+        self.peak = 0
+        self.paths: list[str] = []
+
+    async def __call__(self, api_commands: Command[T]) -> T:
+        """Answer the request after yielding to the other requests."""
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            self.paths.append(api_commands.path_str)
+            if (response := self.responses.get(api_commands.path_str)) is None:
+                raise ClientError(f"Not found: {api_commands.path_str}")
+            return api_commands.process_result(response)
+        finally:
+            self.in_flight -= 1
+
+
+SNAPSHOT_RESPONSES = {
+    "15011/15012": GATEWAY_INFO,
+    "15001": [65539, 65537],
+    "15001/65537": LIGHT_W,
+    "15001/65539": LIGHT_WS,
+    "15004": [131073],
+    "15004/131073": GROUP,
+    "15005/131073": [196625],
+    "15005/131073/196625": MOOD,
+    "15010": [317094],
+    "15010/317094": TASK,
+}
+
+
+async def test_snapshot(gateway: Gateway) -> None:
+    """Test fetching a snapshot of the gateway."""
+    request = FakeRequest(SNAPSHOT_RESPONSES)
+
+    snapshot = await gateway.snapshot(request, max_concurrency=3)
+
+    assert snapshot.gateway_info.id == "7e0000000000000a"
+    assert [device.id for device in snapshot.devices] == [65537, 65539]
+    assert [group.id for group in snapshot.groups] == [131073]
+    assert [mood.id for mood in snapshot.moods[131073]] == [196625]
+    assert [task.id for task in snapshot.smart_tasks] == [317094]
+    assert snapshot.timestamp.tzinfo is timezone.utc
+    assert set(snapshot.timings) == {
+        "gateway_info",
+        "devices",
+        "groups",
+        "moods",
+        "smart_tasks",
+        "total",
+    }
+    assert sorted(request.paths) == sorted(SNAPSHOT_RESPONSES)
+    assert request.peak == 3
+    assert repr(snapshot).endswith("2 devices, 1 groups, 1 smart tasks>")
+
+
+async def test_snapshot_error_cancels_requests(gateway: Gateway) -> None:
+    """Test that a failing request cancels the rest of the snapshot."""
+    responses = dict(SNAPSHOT_RESPONSES)
+    del responses["15004"]
+    request = FakeRequest(responses)
+
+    with pytest.raises(ClientError):
+        await gateway.snapshot(request)
+
+    assert request.in_flight == 0
+    assert "15004/131073" not in request.paths
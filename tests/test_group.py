@@ -4,12 +4,14 @@ import pytest
 
 from pytradfri import error
 from pytradfri.const import (
+    ATTR_DEVICE_STATE,
     ATTR_GROUP_ID,
     ATTR_ID,
     ATTR_LIGHT_COLOR_HUE,
     ATTR_LIGHT_COLOR_SATURATION,
     ATTR_LIGHT_DIMMER,
     ATTR_LIGHT_MIREDS,
+    ATTR_TRANSITION_TIME,
     ROOT_MOODS,
 )
 from pytradfri.gateway import Gateway
@@ -68,3 +70,15 @@ def test_moods(group: Group) -> None:
     """Test moods."""
     cmd = group.moods()
     assert cmd.path == [ROOT_MOODS, str(group.id)]
+
+
+def test_set_desired_values(group: Group) -> None:
+    """Test that only changed values are set on a group."""
+    assert group.set_desired_values({ATTR_DEVICE_STATE: 0}) is None
+
+    command = group.set_desired_values(
+        {ATTR_DEVICE_STATE: 1, ATTR_LIGHT_DIMMER: 0, ATTR_TRANSITION_TIME: 5}
+    )
+
+    assert command is not None
+    assert command.data == {ATTR_DEVICE_STATE: 1, ATTR_TRANSITION_TIME: 5}
@@ -1,21 +1,46 @@
 """Test Light."""
 
+from collections.abc import Generator
+from copy import deepcopy
+import gc
+from unittest.mock import patch
+
 import pytest
 
 from pytradfri import error
+from pytradfri.color import supported_features
+from pytradfri.const import (
+    ATTR_DEVICE_FIRMWARE_VERSION,
+    ATTR_DEVICE_INFO,
+    ATTR_LIGHT_CONTROL,
+    ATTR_LIGHT_MIREDS,
+    SUPPORT_BRIGHTNESS,
+    SUPPORT_COLOR_TEMP,
+    SUPPORT_HEX_COLOR,
+    SUPPORT_RGB_COLOR,
+)
 from pytradfri.device import Device
-from pytradfri.device.light import Light
+from pytradfri.device.light import LIGHT_CAPABILITIES, Light, LightCapabilityRegistry
 from pytradfri.resource import TypeRaw
 
 from .devices import (
     LIGHT_CWS,
     LIGHT_CWS_CUSTOM_COLOR,
+    LIGHT_PHILIPS,
     LIGHT_W,
     LIGHT_WS,
     LIGHT_WS_CUSTOM_COLOR,
 )
 
 
+@pytest.fixture(name="light_capabilities", autouse=True)
+def light_capabilities_fixture() -> Generator[None]:
+    """Forget the light models seen by other tests."""
+    LIGHT_CAPABILITIES.clear()
+    yield
+    LIGHT_CAPABILITIES.clear()
+
+
 def light(raw: TypeRaw) -> Light:
     """Return Light."""
     light_control = Device(raw).light_control
@@ -136,3 +161,87 @@ def test_combine_command() -> None:
 
     with pytest.raises(TypeError):
         device.light_control.combine_commands([dimmer_cmd, combined_cmd])
+
+
+def test_supported_features_cached() -> None:
+    """Test that the supported features are computed once per raw update."""
+    bulb = light(LIGHT_WS)
+    with patch(
+        "pytradfri.device.light.supported_features", wraps=supported_features
+    ) as mock_supported_features:
+        assert bulb.supports_dimmer
+        assert bulb.supports_color_temp
+        assert bulb.supports_xy_color
+        assert not bulb.supports_hsb_xy_color
+        assert mock_supported_features.call_count == 1
+
+        bulb.device.update().process_result(deepcopy(LIGHT_WS))
+        assert bulb.supports_dimmer
+        assert mock_supported_features.call_count == 2
+
+
+def test_supported_features_per_light() -> None:
+    """Test that a light of a known model has its own features."""
+    no_color_temp = deepcopy(LIGHT_WS)
+    del no_color_temp[ATTR_LIGHT_CONTROL][0][ATTR_LIGHT_MIREDS]  # type: ignore[union-attr]
+    first = light(no_color_temp)
+    assert not first.supports_color_temp
+
+    bulb = light(LIGHT_WS)
+    assert bulb.supports_color_temp
+    assert LIGHT_CAPABILITIES.features(bulb.device) == bulb.supported_features
+    assert LIGHT_CAPABILITIES.lights(SUPPORT_COLOR_TEMP) == [bulb]
+
+    first.device.update().process_result(deepcopy(LIGHT_WS))
+    assert first.supports_color_temp
+
+
+def test_capability_registry() -> None:
+    """Test that the registry keeps the union of the features of a model."""
+    registry = LightCapabilityRegistry()
+    device = Device(LIGHT_WS)
+    other_firmware = deepcopy(LIGHT_WS)
+    other_firmware[ATTR_DEVICE_INFO][ATTR_DEVICE_FIRMWARE_VERSION] = "2.3.087"  # type: ignore[index]
+
+    assert registry.features(device) is None
+
+    registry.record(device, SUPPORT_BRIGHTNESS)
+    registry.record(device, SUPPORT_COLOR_TEMP)
+    registry.record(Device(other_firmware), SUPPORT_BRIGHTNESS)
+
+    assert registry.features(device) == SUPPORT_BRIGHTNESS | SUPPORT_COLOR_TEMP
+    assert registry.models(SUPPORT_COLOR_TEMP) == [
+        ("IKEA of Sweden", "TRADFRI bulb E27 WS opal 980lm", "1.2.217")
+    ]
+    assert len(registry.models()) == 2
+    assert not registry.models(SUPPORT_HEX_COLOR)
+
+    registry.clear()
+    assert registry.features(device) is None
+
+
+def test_capability_registry_lookup() -> None:
+    """Test finding the devices and lights supporting features."""
+    registry = LightCapabilityRegistry()
+    devices = [Device(raw) for raw in (LIGHT_CWS, LIGHT_WS, LIGHT_PHILIPS, LIGHT_W)]
+    cws, ws, philips, white = devices
+    for device in devices:
+        registry.add(device)
+
+    assert registry.devices() == [white, ws, cws, philips]
+    assert registry.devices(SUPPORT_COLOR_TEMP) == [ws, philips]
+    assert registry.devices(SUPPORT_RGB_COLOR) == [cws]
+    assert registry.lights(SUPPORT_RGB_COLOR) == cws.light_control.lights  # type: ignore[union-attr]
+
+    # A device is indexed under its current model only.
+    upgraded = deepcopy(LIGHT_W)
+    upgraded[ATTR_DEVICE_INFO][ATTR_DEVICE_FIRMWARE_VERSION] = "2.3.087"  # type: ignore[index]
+    white.raw = Device(upgraded).raw
+    registry.add(white)
+    assert registry.devices(SUPPORT_BRIGHTNESS) == [white, ws, cws, philips]
+    assert len(registry.models()) == 5
+
+    # Devices are not kept alive by the registry.
+    del devices, cws, ws
+    gc.collect()
+    assert registry.devices() == [white, philips]
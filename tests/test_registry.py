@@ -0,0 +1,104 @@
+"""Test the device registry."""
+
+from copy import deepcopy
+import json
+
+from pytradfri.const import (
+    ATTR_APPLICATION_TYPE_BLIND,
+    ATTR_DEVICE_INFO,
+    ATTR_DEVICE_SERIAL,
+    ATTR_HS_LINK,
+    ATTR_ID,
+    ATTR_NAME,
+)
+from pytradfri.device import Device
+from pytradfri.gateway import Gateway
+from pytradfri.group import Group
+from pytradfri.registry import DeviceRegistry
+from pytradfri.resource import TypeRaw
+
+from .common import load_fixture
+from .devices import GROUP, LIGHT_W, LIGHT_WS, OUTLET, REMOTE_CONTROL
+
+
+def device(raw: TypeRaw, device_id: int, name: str | None = None) -> Device:
+    """Return a device with another id and name."""
+    raw = deepcopy(raw)
+    raw[ATTR_ID] = device_id
+    raw[ATTR_DEVICE_INFO][ATTR_DEVICE_SERIAL] = f"serial-{device_id}"  # type: ignore[index]
+    if name is not None:
+        raw[ATTR_NAME] = name
+    return Device(raw)
+
+
+def group(group_id: int, member_ids: list[int]) -> Group:
+    """Return a group with the members."""
+    raw = deepcopy(GROUP)
+    raw[ATTR_ID] = group_id
+    raw["9018"] = {ATTR_HS_LINK: {ATTR_ID: member_ids}}
+    return Group(Gateway(), raw)
+
+
+def test_lookups() -> None:
+    """Test looking up devices by id and attributes."""
+    blind_raw = json.loads(load_fixture("blind.json"))
+    registry = DeviceRegistry(
+        [
+            device(LIGHT_W, 1, "Hall"),
+            device(LIGHT_W, 2, "Kitchen"),
+            device(LIGHT_WS, 3, "Hall"),
+            device(OUTLET, 4),
+            device(blind_raw, 5),
+            device(blind_raw, 6),
+        ],
+        [group(100, [1, 3, 5]), group(101, [2, 6, 99])],
+    )
+
+    assert len(registry) == 6
+    assert 4 in registry
+    assert registry.get(7) is None
+    assert [dev.id for dev in registry.by_name("Hall")] == [1, 3]
+    assert [dev.id for dev in registry.by_model(LIGHT_W["3"]["1"])] == [1, 2]  # type: ignore[index]
+    assert [dev.id for dev in registry.by_serial("serial-4")] == [4]
+    assert [dev.id for dev in registry.by_application_type(2)] == [1, 2, 3]
+    assert [dev.id for dev in registry.in_group(101)] == [2, 6]
+    assert [
+        dev.id
+        for dev in registry.find(
+            application_type=ATTR_APPLICATION_TYPE_BLIND, group_id=100
+        )
+    ] == [5]
+    assert registry.find(name="Hall", group_id=101) == []
+    assert registry.by_name("Unknown") == []
+    assert len(registry.find()) == 6
+    assert registry.groups_of(1) == {100}
+    assert repr(registry) == "<DeviceRegistry 6 devices>"
+
+
+def test_updates() -> None:
+    """Test keeping the indexes up to date."""
+    hall = device(LIGHT_W, 1, "Hall")
+    registry = DeviceRegistry([hall, device(OUTLET, 2), device(REMOTE_CONTROL, 3)])
+
+    command = hall.observe(registry.observe_callback, None, patch=True)
+    response = deepcopy(LIGHT_W)
+    response[ATTR_ID] = 1
+    response[ATTR_NAME] = "Porch"
+    command.process_result(response)
+
+    assert registry.by_name("Hall") == []
+    assert registry.by_name("Porch") == [hall]
+
+    registry.observe_callback(group(100, [1, 2]))
+    assert [dev.id for dev in registry.in_group(100)] == [1, 2]
+    registry.observe_callback(group(100, [2]))
+    assert registry.groups_of(1) == set()
+    registry.remove_group(100)
+    assert registry.in_group(100) == []
+
+    registry.sync([device(OUTLET, 2, "Plug"), device(LIGHT_WS, 4)])
+
+    assert [dev.id for dev in registry] == [2, 4]
+    assert [dev.id for dev in registry.by_name("Plug")] == [2]
+    assert registry.by_name("Porch") == []
+    assert registry.by_application_type(0) == []